@@ -1,23 +1,45 @@
 from typing import Dict, List, Any
+import asyncio
+import ast
+import collections
+import functools
 import json
 import re
-from groq import Groq
+import threading
+import time
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
+from groq import Groq, AsyncGroq
 from config import Config
+from utils.cache import LLMCache
 
-class LLMAnalyzer:
-    """Uses Groq LLM to provide intelligent code review suggestions"""
-    
-    def __init__(self):
-        self.client = Groq(api_key=Config.GROQ_API_KEY)
-        self.model = Config.GROQ_MODEL
-        
-        self.system_prompt = """You are an expert code reviewer. Analyze the provided code changes and:
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_loads(data):
+    """Parse JSON with orjson when available (3-8x faster than stdlib)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Review instructions shared by every analyzer instance. Hoisted to module
+# scope so constructing an LLMAnalyzer allocates no prompt strings.
+#
+# Keep this byte-identical between calls and free of interpolated fields:
+# providers cache prompt prefixes, and any per-call variation in the
+# system message defeats that cache. All dynamic content (file path, code,
+# static issues) belongs in the user message, after the fixed preamble.
+_SYSTEM_PROMPT = """You are an expert code reviewer. Analyze the provided code changes and:
 1. Identify anti-patterns and code smells
 2. Suggest improvements for readability and maintainability
 3. Point out potential bugs or logic errors
 4. Recommend best practices
 5. Provide auto-fix suggestions for simple issues
 
+Static analysis issues are provided as TSV rows (lines, type, message); the lines column may aggregate several line numbers.
+
 Be concise and actionable. Format your response as JSON with this structure:
 {
     "issues": [
@@ -32,6 +54,50 @@ Be concise and actionable. Format your response as JSON with this structure:
     ],
     "overall_feedback": "General comments about the changes"
 }"""
+
+# Largest code snippet sent in a single LLM call
+_MAX_SNIPPET_CHARS = 3000
+
+# Shared disk-backed response cache - identical prompts skip the API entirely
+_response_cache = LLMCache(cache_dir='.llm_cache', ttl=86400)
+
+# Precompiled fence/brace patterns for _extract_json; the second element
+# says whether the JSON body is in capture group 1 or the whole match
+_JSON_PATTERNS = [
+    (re.compile(r'```json\s*(.*?)\s*```', re.DOTALL), True),
+    (re.compile(r'```\s*(.*?)\s*```', re.DOTALL), True),
+    (re.compile(r'\{.*\}', re.DOTALL), False),
+]
+
+@functools.lru_cache(maxsize=1)
+def _get_groq_client(api_key: str) -> Groq:
+    """
+    Return a shared Groq client for the given API key
+
+    Creating a Groq client builds a fresh HTTP connection pool, so every
+    new instance pays a TCP+TLS handshake on its first call. Caching the
+    client lets all analyzer instances share one pool with keep-alive.
+    """
+    return Groq(api_key=api_key)
+
+@functools.lru_cache(maxsize=1)
+def _get_async_groq_client(api_key: str) -> AsyncGroq:
+    """Return a shared AsyncGroq client for the given API key"""
+    return AsyncGroq(api_key=api_key)
+
+class LLMAnalyzer:
+    """Uses Groq LLM to provide intelligent code review suggestions"""
+
+    def __init__(self):
+        self.client = _get_groq_client(Config.GROQ_API_KEY)
+        self.async_client = _get_async_groq_client(Config.GROQ_API_KEY)
+        self.model = Config.GROQ_MODEL
+
+        # In-flight request futures for single-flight coalescing
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
+        self.system_prompt = _SYSTEM_PROMPT
     
     def analyze_code(self, file_path: str, code: str, static_issues: List[Dict]) -> Dict[str, Any]:
         """
@@ -46,28 +112,339 @@ Be concise and actionable. Format your response as JSON with this structure:
             Dictionary containing LLM analysis results
         """
         try:
-            # Prepare static issues summary
-            static_summary = self._format_static_issues(static_issues)
-            
-            # Truncate code if too long
-            code_snippet = code[:3000] if len(code) > 3000 else code
-            
-            # Prepare user message
-            user_message = f"""File: {file_path}
+            # Trivially clean files don't need an LLM round-trip at all
+            if self._should_skip(code, static_issues):
+                return {
+                    'issues': [],
+                    'overall_feedback': 'No issues found',
+                    'success': True
+                }
+
+            # Large files get chunked and analyzed concurrently instead of
+            # silently truncating everything past the first 3000 chars
+            if len(code) > _MAX_SNIPPET_CHARS:
+                return self._analyze_chunked(file_path, code, static_issues)
+
+            user_message = self._build_user_message(file_path, code, static_issues)
+
+            # Serve identical requests from the disk cache
+            cache_key = LLMCache.make_key(
+                model=self.model,
+                temperature=0.3,
+                system=self.system_prompt,
+                user=user_message
+            )
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            # Single-flight: concurrent callers with the same key share one
+            # API call instead of issuing duplicate requests
+            with self._inflight_lock:
+                future = self._inflight.get(cache_key)
+                is_owner = future is None
+                if is_owner:
+                    future = Future()
+                    self._inflight[cache_key] = future
+
+            if not is_owner:
+                return future.result()
+
+            try:
+                analysis = self._request_analysis(user_message, cache_key)
+                future.set_result(analysis)
+                return analysis
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(cache_key, None)
+
+        except Exception as e:
+            print(f"LLM analysis error: {e}")
+            return {
+                'issues': [],
+                'overall_feedback': f'LLM analysis failed: {str(e)}',
+                'success': False
+            }
+
+    def _request_analysis(self, user_message: str, cache_key: str) -> Dict[str, Any]:
+        """Issue the analysis request to Groq with retry logic"""
+        max_retries = 2
+        for attempt in range(max_retries):
+            try:
+                chat_completion = self.client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": self.system_prompt
+                        },
+                        {
+                            "role": "user",
+                            "content": user_message
+                        }
+                    ],
+                    model=self.model,
+                    temperature=0.3,
+                    max_tokens=800,
+                    response_format={"type": "json_object"}
+                )
+
+                response_content = chat_completion.choices[0].message.content
+
+                # JSON mode constrains the decode to valid JSON;
+                # _extract_json stays as a safety net
+                result = self._extract_json(response_content)
+
+                if result:
+                    analysis = {
+                        'issues': result.get('issues', []),
+                        'overall_feedback': result.get('overall_feedback', ''),
+                        'success': True
+                    }
+                    _response_cache.set(cache_key, analysis)
+                    return analysis
+                else:
+                    print(f"Failed to parse LLM response (attempt {attempt + 1})")
+                    if attempt < max_retries - 1:
+                        continue
+
+            except Exception as e:
+                print(f"LLM API error (attempt {attempt + 1}): {e}")
+                if attempt < max_retries - 1:
+                    # Exponential backoff with jitter so rate-limit and 5xx
+                    # bursts aren't hammered with immediate retries
+                    time.sleep(2 ** attempt + random.random())
+                    continue
+
+        # If all retries failed
+        return {
+            'issues': [],
+            'overall_feedback': 'LLM analysis failed after retries',
+            'success': False
+        }
+
+    def _analyze_chunked(self, file_path: str, code: str, static_issues: List[Dict]) -> Dict[str, Any]:
+        """
+        Analyze a large file as concurrent chunks and merge the results
+
+        Chunks are cut on top-level definition boundaries where possible,
+        analyzed in parallel, and issue line numbers are remapped back to
+        the original file.
+
+        Args:
+            file_path: Path of the file
+            code: Full code content
+            static_issues: Issues found by static analysis
+
+        Returns:
+            Merged analysis result covering the whole file
+        """
+        chunks = self._chunk_code(code)
+
+        with ThreadPoolExecutor(max_workers=min(4, len(chunks))) as executor:
+            futures = []
+            for start_line, chunk_text in chunks:
+                end_line = start_line + chunk_text.count('\n')
+                chunk_issues = [
+                    issue for issue in static_issues
+                    if start_line <= issue.get('line', 0) <= end_line
+                ]
+                # Hard cap as a recursion guard: a chunk the splitter
+                # couldn't cut below the limit (e.g. one enormous line)
+                # would re-enter analyze_code -> _analyze_chunked with
+                # identical input and never terminate. Truncating here
+                # loses nothing - _build_user_message caps the snippet
+                # at the same limit anyway.
+                if len(chunk_text) > _MAX_SNIPPET_CHARS:
+                    chunk_text = chunk_text[:_MAX_SNIPPET_CHARS]
+                futures.append((start_line, executor.submit(
+                    self.analyze_code,
+                    f"{file_path} (from line {start_line})",
+                    chunk_text,
+                    chunk_issues
+                )))
+
+            merged_issues = []
+            feedback_parts = []
+            seen = set()
+            success = True
+
+            for start_line, future in futures:
+                result = future.result()
+                success = success and result.get('success', False)
+
+                for issue in result.get('issues', []):
+                    line = issue.get('line', 0) + start_line - 1
+                    key = (line, issue.get('message', ''))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    merged_issues.append({**issue, 'line': line})
+
+                feedback = result.get('overall_feedback', '')
+                if feedback:
+                    feedback_parts.append(feedback)
+
+        return {
+            'issues': merged_issues,
+            'overall_feedback': ' '.join(feedback_parts),
+            'success': success
+        }
+
+    @staticmethod
+    def _chunk_code(code: str, max_chars: int = None) -> List[tuple]:
+        """
+        Split code into (start_line, text) chunks on definition boundaries
+
+        Args:
+            code: Full code content
+            max_chars: Maximum characters per chunk
+
+        Returns:
+            List of (1-based start line, chunk text) tuples
+        """
+        if max_chars is None:
+            max_chars = _MAX_SNIPPET_CHARS
+
+        lines = code.split('\n')
+
+        # Prefer top-level definition boundaries so chunks stay coherent
+        boundaries = [0]
+        try:
+            tree = ast.parse(code)
+            boundaries.extend(
+                node.lineno - 1 for node in tree.body
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+            )
+        except (SyntaxError, ValueError, RecursionError):
+            # RecursionError: deeply nested generated expressions can
+            # blow the parser's stack long before the size limits here
+            pass
+
+        boundaries = sorted(set(boundaries))
+        chunks = []
+        current_start = 0
+        current_size = 0
+
+        for idx, boundary in enumerate(boundaries):
+            next_boundary = boundaries[idx + 1] if idx + 1 < len(boundaries) else len(lines)
+            section = '\n'.join(lines[boundary:next_boundary])
+
+            if current_size and current_size + len(section) > max_chars:
+                chunks.append((current_start + 1, '\n'.join(lines[current_start:boundary])))
+                current_start = boundary
+                current_size = 0
+
+            current_size += len(section) + 1
+
+        if current_start < len(lines):
+            chunks.append((current_start + 1, '\n'.join(lines[current_start:])))
+
+        # Fallback: definition boundaries can still leave oversized
+        # chunks (a single huge function, unparseable text with no
+        # boundaries at all) - re-cut any such chunk on plain line
+        # counts so nothing over the limit survives the split
+        if any(len(text) > max_chars for _, text in chunks):
+            refined = []
+            for start, text in chunks:
+                if len(text) <= max_chars:
+                    refined.append((start, text))
+                    continue
+                # Greedy accumulation: take lines until the next one
+                # would push past the limit, always at least one line
+                chunk_lines = text.split('\n')
+                piece_start = 0
+                piece_size = 0
+                for offset, line in enumerate(chunk_lines):
+                    if piece_size and piece_size + len(line) + 1 > max_chars:
+                        refined.append((start + piece_start,
+                                        '\n'.join(chunk_lines[piece_start:offset])))
+                        piece_start = offset
+                        piece_size = 0
+                    piece_size += len(line) + 1
+                refined.append((start + piece_start,
+                                '\n'.join(chunk_lines[piece_start:])))
+            chunks = refined
+
+        return chunks
+
+    @staticmethod
+    def _should_skip(code: str, static_issues: List[Dict]) -> bool:
+        """
+        Decide whether a file is too trivial to be worth an LLM call
+
+        Small files with zero static issues that parse cleanly (empty
+        __init__.py, version stubs, generated boilerplate) make up a large
+        share of PR files; skipping them saves the dominant latency and
+        token cost.
+        """
+        if static_issues or len(code) >= 500 or 'TODO' in code:
+            return False
+
+        try:
+            ast.parse(code)
+            return True
+        except (SyntaxError, ValueError):
+            # Broken or non-Python content - let the LLM look at it
+            return False
+
+    def _build_user_message(self, file_path: str, code: str, static_issues: List[Dict]) -> str:
+        """Build the per-file user message sent to the LLM"""
+        # Prepare static issues summary
+        static_summary = self._format_static_issues(static_issues)
+
+        # Truncate code if too long
+        code_snippet = code[:_MAX_SNIPPET_CHARS] if len(code) > _MAX_SNIPPET_CHARS else code
+
+        # Fixed instruction first so the cacheable prefix (system prompt +
+        # this line) stays identical across calls
+        return f"""Please analyze this code and provide suggestions in JSON format.
+
+File: {file_path}
 
 Code:
 {code_snippet}
 
 Static Analysis Issues:
-{static_summary}
+{static_summary}"""
+
+    async def analyze_code_async(self, file_path: str, code: str, static_issues: List[Dict]) -> Dict[str, Any]:
+        """
+        Async variant of analyze_code using the shared AsyncGroq client
+
+        Deliberately simpler than the sync path: no disk cache, no
+        single-flight coalescing, and no chunked analysis - content
+        past the snippet limit is truncated where analyze_code would
+        split and analyze it in full. The sync helpers block on file
+        and lock I/O, which has no place on an event loop, and nothing
+        in the review pipeline drives this entry point today. Prefer
+        analyze_code unless calling from async code, and expect the
+        two to differ on large or repeated inputs.
+
+        Args:
+            file_path: Path of the file
+            code: Code content
+            static_issues: Issues found by static analysis
+
+        Returns:
+            Dictionary containing LLM analysis results
+        """
+        try:
+            if self._should_skip(code, static_issues):
+                return {
+                    'issues': [],
+                    'overall_feedback': 'No issues found',
+                    'success': True
+                }
+
+            user_message = self._build_user_message(file_path, code, static_issues)
 
-Please analyze this code and provide suggestions in JSON format."""
-            
-            # Get LLM response with retry logic
             max_retries = 2
             for attempt in range(max_retries):
                 try:
-                    chat_completion = self.client.chat.completions.create(
+                    chat_completion = await self.async_client.chat.completions.create(
                         messages=[
                             {
                                 "role": "system",
@@ -80,15 +457,13 @@ Please analyze this code and provide suggestions in JSON format."""
                         ],
                         model=self.model,
                         temperature=0.3,
-                        max_tokens=2000
+                        max_tokens=800,
+                        response_format={"type": "json_object"}
                     )
-                    
-                    # Parse response
+
                     response_content = chat_completion.choices[0].message.content
-                    
-                    # Extract and parse JSON
                     result = self._extract_json(response_content)
-                    
+
                     if result:
                         return {
                             'issues': result.get('issues', []),
@@ -99,19 +474,19 @@ Please analyze this code and provide suggestions in JSON format."""
                         print(f"Failed to parse LLM response (attempt {attempt + 1})")
                         if attempt < max_retries - 1:
                             continue
-                        
+
                 except Exception as e:
                     print(f"LLM API error (attempt {attempt + 1}): {e}")
                     if attempt < max_retries - 1:
+                        await asyncio.sleep(2 ** attempt + random.random())
                         continue
-            
-            # If all retries failed
+
             return {
                 'issues': [],
                 'overall_feedback': 'LLM analysis failed after retries',
                 'success': False
             }
-            
+
         except Exception as e:
             print(f"LLM analysis error: {e}")
             return {
@@ -119,29 +494,171 @@ Please analyze this code and provide suggestions in JSON format."""
                 'overall_feedback': f'LLM analysis failed: {str(e)}',
                 'success': False
             }
-    
+
+    async def analyze_many(self, items: List[Dict[str, Any]], max_concurrency: int = 5) -> List[Dict[str, Any]]:
+        """
+        Analyze many files concurrently with bounded parallelism
+
+        Fans the per-file LLM calls out with asyncio.gather so wall-clock
+        time approaches the slowest single call instead of the sum. The
+        semaphore keeps concurrency within Groq rate limits. Built on
+        analyze_code_async, so it inherits that path's limitations
+        (no caching, coalescing or chunking - see its docstring).
+
+        Args:
+            items: List of dicts with 'path', 'code' and 'static_issues' keys
+            max_concurrency: Maximum number of in-flight LLM calls
+
+        Returns:
+            List of analysis results in the same order as items
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def analyze_one(item):
+            async with semaphore:
+                return await self.analyze_code_async(
+                    item['path'],
+                    item['code'],
+                    item.get('static_issues', [])
+                )
+
+        results = await asyncio.gather(
+            *(analyze_one(item) for item in items),
+            return_exceptions=True
+        )
+
+        # Normalize exceptions into failure results
+        normalized = []
+        for item, result in zip(items, results):
+            if isinstance(result, Exception):
+                print(f"LLM analysis failed for {item['path']}: {result}")
+                normalized.append({
+                    'issues': [],
+                    'overall_feedback': f'LLM analysis failed: {result}',
+                    'success': False
+                })
+            else:
+                normalized.append(result)
+
+        return normalized
+
+    def analyze_batch(self, files: List[Dict[str, Any]], max_batch_size: int = 8) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze several files in a single LLM call
+
+        Packing multiple files into one prompt amortizes the network
+        round-trip and prompt-prefill cost across the batch instead of
+        paying 1-3 seconds per file.
+
+        Args:
+            files: List of dicts with 'path', 'code' and 'static_issues' keys
+            max_batch_size: Maximum files per LLM call
+
+        Returns:
+            Dictionary mapping file path to its analysis result
+        """
+        results = {}
+
+        for start in range(0, len(files), max_batch_size):
+            batch = files[start:start + max_batch_size]
+
+            try:
+                # Build one labeled section per file
+                sections = []
+                for idx, item in enumerate(batch, 1):
+                    code_snippet = item['code'][:3000]
+                    static_summary = self._format_static_issues(item.get('static_issues', []))
+                    sections.append(
+                        f"=== FILE {idx}: {item['path']} ===\n"
+                        f"{code_snippet}\n"
+                        f"=== STATIC ISSUES {idx} ===\n"
+                        f"{static_summary}"
+                    )
+
+                user_message = (
+                    "\n\n".join(sections) +
+                    "\n\nAnalyze each file above. Respond with a JSON object mapping "
+                    "each file path to its analysis in the usual format "
+                    '({"issues": [...], "overall_feedback": "..."}).'
+                )
+
+                chat_completion = self.client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": self.system_prompt
+                        },
+                        {
+                            "role": "user",
+                            "content": user_message
+                        }
+                    ],
+                    model=self.model,
+                    temperature=0.3,
+                    max_tokens=800 * len(batch),
+                    response_format={"type": "json_object"}
+                )
+
+                response_content = chat_completion.choices[0].message.content
+                parsed = self._extract_json(response_content)
+
+                if parsed:
+                    # Models routinely drop or rename keys in multi-file
+                    # JSON - anything missing from the response gets a
+                    # real per-file analysis below rather than being
+                    # reported as a clean success it never had
+                    dropped = []
+                    for item in batch:
+                        file_result = parsed.get(item['path'])
+                        if not isinstance(file_result, dict):
+                            dropped.append(item)
+                            continue
+                        results[item['path']] = {
+                            'issues': file_result.get('issues', []),
+                            'overall_feedback': file_result.get('overall_feedback', ''),
+                            'success': True
+                        }
+                    if dropped:
+                        print(f"Batch response missing {len(dropped)} file(s), re-analyzing individually")
+                        for item in dropped:
+                            results[item['path']] = self.analyze_code(
+                                item['path'],
+                                item['code'],
+                                item.get('static_issues', [])
+                            )
+                    continue
+
+                print(f"Failed to parse batch LLM response, falling back to per-file analysis")
+
+            except Exception as e:
+                print(f"Batch LLM analysis error: {e}")
+
+            # Fallback: analyze this batch file-by-file
+            for item in batch:
+                results[item['path']] = self.analyze_code(
+                    item['path'],
+                    item['code'],
+                    item.get('static_issues', [])
+                )
+
+        return results
+
     def _extract_json(self, response_content: str) -> Dict[str, Any]:
         """Extract JSON from response, handling markdown code blocks"""
         try:
             # Try direct JSON parse first
-            return json.loads(response_content)
-        except json.JSONDecodeError:
+            return _json_loads(response_content)
+        except ValueError:
             pass
         
         # Try extracting from markdown code blocks
-        patterns = [
-            r'```json\s*(.*?)\s*```',
-            r'```\s*(.*?)\s*```',
-            r'\{.*\}',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, response_content, re.DOTALL)
+        for pattern, use_group in _JSON_PATTERNS:
+            match = pattern.search(response_content)
             if match:
                 try:
-                    json_str = match.group(1) if pattern.startswith('```') else match.group(0)
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
+                    json_str = match.group(1) if use_group else match.group(0)
+                    return _json_loads(json_str)
+                except ValueError:
                     continue
         
         print(f"Could not extract JSON from response: {response_content[:200]}")
@@ -168,6 +685,15 @@ Original code:
 
 Generate a unified diff format fix. Be precise and minimal."""
 
+            cache_key = LLMCache.make_key(
+                model=self.model,
+                temperature=0.3,
+                user=prompt
+            )
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
             chat_completion = self.client.chat.completions.create(
                 messages=[
                     {
@@ -177,11 +703,13 @@ Generate a unified diff format fix. Be precise and minimal."""
                 ],
                 model=self.model,
                 temperature=0.3,
-                max_tokens=1000
+                max_tokens=600
             )
-            
-            return chat_completion.choices[0].message.content
-            
+
+            fix = chat_completion.choices[0].message.content
+            _response_cache.set(cache_key, fix)
+            return fix
+
         except Exception as e:
             return f"Auto-fix generation failed: {str(e)}"
     
@@ -206,7 +734,16 @@ List any anti-patterns found with:
 3. Why it's problematic
 4. Recommended alternative
 
-Format as JSON array."""
+Format as a JSON object: {"patterns": [...]}."""
+
+            cache_key = LLMCache.make_key(
+                model=self.model,
+                temperature=0.3,
+                user=prompt
+            )
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                return cached
 
             chat_completion = self.client.chat.completions.create(
                 messages=[
@@ -217,18 +754,24 @@ Format as JSON array."""
                 ],
                 model=self.model,
                 temperature=0.3,
-                max_tokens=1500
+                max_tokens=800,
+                response_format={"type": "json_object"}
             )
             
             response_content = chat_completion.choices[0].message.content
             result = self._extract_json(response_content)
-            
+
             if result and isinstance(result, list):
-                return result
+                patterns = result
             elif result and isinstance(result, dict):
-                return result.get('patterns', [])
-            
-            return []
+                patterns = result.get('patterns', [])
+            else:
+                patterns = []
+
+            if patterns:
+                _response_cache.set(cache_key, patterns)
+
+            return patterns
             
         except Exception as e:
             print(f"Anti-pattern detection error: {e}")
@@ -236,15 +779,27 @@ Format as JSON array."""
     
     @staticmethod
     def _format_static_issues(issues: List[Dict]) -> str:
-        """Format static analysis issues for LLM context"""
+        """
+        Format static analysis issues as compact TSV for LLM context
+
+        Tab-separated rows carry the same information as prose lines in
+        roughly half the tokens, which shrinks prompt prefill cost.
+        """
         if not issues:
             return "No static analysis issues found."
-        
-        formatted = []
-        for issue in issues[:10]:  # Limit to top 10 issues
-            line = issue.get('line', 'N/A')
-            issue_type = issue.get('type', 'unknown')
-            message = issue.get('message', 'No message')
-            formatted.append(f"- Line {line}: {issue_type} - {message}")
-        
-        return "\n".join(formatted)
\ No newline at end of file
+
+        # Group near-duplicate messages (same symbol on different lines)
+        # so repeats don't crowd more informative issues out of the top 10
+        groups = collections.defaultdict(list)
+        for issue in issues:
+            key = (issue.get('type', 'unknown'), issue.get('message', ''))
+            groups[key].append(issue.get('line', ''))
+
+        top_groups = sorted(groups.items(), key=lambda kv: len(kv[1]), reverse=True)[:10]
+
+        rows = ["lines\ttype\tmessage"]
+        for (issue_type, message), lines in top_groups:
+            line_list = ','.join(str(line) for line in lines)
+            rows.append(f"{line_list}\t{issue_type}\t{message}")
+
+        return "\n".join(rows)
\ No newline at end of file
@@ -1,14 +1,84 @@
 import subprocess
+import atexit
 import json
-import tempfile
+import functools
+import hashlib
 import os
-from typing import Dict, List, Any
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+from utils.cache import DiskCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _tool_versions() -> str:
+    """Pinned tool versions, folded into cache keys so upgrades invalidate"""
+    from importlib import metadata
+
+    versions = []
+    for tool in ('pylint', 'bandit', 'radon'):
+        try:
+            versions.append(f"{tool}={metadata.version(tool)}")
+        except Exception:
+            versions.append(f"{tool}=unknown")
+    return ','.join(versions)
+
+_TOOL_VERSIONS = _tool_versions()
+
+# Environment for tool subprocesses, built once. -I plus these flags
+# skip user-site scanning and .pyc writes, shaving tens of ms off each
+# interpreter launch.
+_TOOL_ENV = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1', 'PYTHONNOUSERSITE': '1'}
+
+@functools.lru_cache(maxsize=1)
+def _batch_dir() -> str:
+    """
+    Parent scratch directory for batched tool runs, created once
+
+    Each analyze_files call makes its own mkdtemp subdirectory under
+    here - concurrent PR reviews run on one analyzer singleton, and
+    batch files are named by repo-relative path, so a shared directory
+    would let two PRs touching the same path overwrite each other's
+    files mid-scan. The whole tree is removed at process exit as a
+    backstop for batches interrupted before their own cleanup.
+    """
+    path = tempfile.mkdtemp(prefix='xcode-static-')
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+# Persistent memo of per-file results - PR resyncs usually change only a
+# couple of files, so most analyze_file calls hit this and skip the tools
+_static_cache = DiskCache(
+    cache_dir=os.path.join(os.path.expanduser('~'), '.cache', 'xcode-static'),
+    ttl=7 * 86400
+)
+
+def _json_loads(data):
+    """
+    Parse JSON with orjson when available (3-8x faster than stdlib)
+
+    Accepts bytes directly - tool stdout is kept undecoded so orjson
+    parses utf-8 natively without an intermediate str copy.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 class StaticAnalyzer:
     """Performs static analysis on code using various tools"""
     
     def __init__(self):
         self.tools = ['pylint', 'bandit', 'radon']
+
+        # One worker per tool, owned by the instance so repeated
+        # analyze_file calls don't pay pool setup/teardown each time
+        self._tool_pool = ThreadPoolExecutor(max_workers=3)
     
     def analyze_file(self, file_path: str, file_content: str) -> Dict[str, Any]:
         """
@@ -29,26 +99,79 @@ class StaticAnalyzer:
             'summary': {}
         }
         
-        # Skip non-Python files
+        # Skip non-Python files. should_review_file upstream is a
+        # denylist, so non-Python source (.js, .go, ...) still reaches
+        # here - this check is the only thing keeping it out of the
+        # Python-only tools.
         if not file_path.endswith('.py'):
             return results
-        
-        # Create temporary file for analysis
-        tmp_path = None
+
+        # Nothing to analyze - don't spawn three subprocesses for an
+        # empty __init__.py
+        if not file_content.strip():
+            return results
+
+        # A file that doesn't parse would make every tool fail or emit
+        # noise; compile once and report the syntax error directly
         try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as tmp:
-                tmp.write(file_content)
-                tmp_path = tmp.name
-            
-            # Run pylint for style issues
-            results['style_issues'] = self._run_pylint(tmp_path)
-            
-            # Run bandit for security issues
-            results['security_issues'] = self._run_bandit(tmp_path)
-            
-            # Run radon for complexity
-            results['complexity_issues'] = self._run_radon(tmp_path)
-            
+            compile(file_content, file_path, 'exec')
+        except SyntaxError as e:
+            results['style_issues'] = [{
+                'type': 'style',
+                'tool': 'python',
+                'line': e.lineno or 0,
+                'column': e.offset or 0,
+                'message': f"Syntax error: {e.msg}",
+                'symbol': 'syntax-error',
+                'severity': 'high'
+            }]
+            results['summary'] = {
+                'total_issues': 1,
+                'style_count': 1,
+                'security_count': 0,
+                'complexity_count': 0
+            }
+            return results
+
+        # Identical content (keyed with tool versions) skips the tools
+        cache_key = DiskCache.make_key(
+            content=hashlib.sha256(file_content.encode('utf-8')).hexdigest(),
+            tools=_TOOL_VERSIONS
+        )
+        cached = _static_cache.get(cache_key)
+        if cached is not None:
+            cached['file'] = file_path
+            return cached
+
+        try:
+            # Run the three tools concurrently - they are independent
+            # subprocesses, so wall-clock drops to the slowest tool
+            # instead of the sum of all three. Code is piped over stdin,
+            # avoiding a tempfile write/unlink round-trip per file.
+            style_future = self._tool_pool.submit(self._run_pylint, file_path, file_content)
+            security_future = self._tool_pool.submit(self._run_bandit, file_content)
+
+            # Complexity on a handful of lines is always trivial - skip
+            # radon for files under 5 non-blank lines
+            non_blank = sum(1 for l in file_content.splitlines() if l.strip())
+            if non_blank >= 5:
+                complexity_future = self._tool_pool.submit(self._run_radon, file_content)
+            else:
+                complexity_future = None
+
+            style = style_future.result()
+            security = security_future.result()
+            complexity = complexity_future.result() if complexity_future else []
+
+            # None signals a tool error/timeout (distinct from a clean
+            # empty list) - report what we have but keep the result out
+            # of the 7-day cache, or one transient timeout would pin
+            # "0 issues" for this content across restarts
+            tools_ok = style is not None and security is not None and complexity is not None
+            results['style_issues'] = style or []
+            results['security_issues'] = security or []
+            results['complexity_issues'] = complexity or []
+
             # Generate summary
             results['summary'] = {
                 'total_issues': len(results['style_issues']) + len(results['security_issues']) + len(results['complexity_issues']),
@@ -56,31 +179,236 @@ class StaticAnalyzer:
                 'security_count': len(results['security_issues']),
                 'complexity_count': len(results['complexity_issues'])
             }
-            
+
+            if tools_ok:
+                _static_cache.set(cache_key, results)
+
         except Exception as e:
             print(f"Error in static analysis: {e}")
-        finally:
-            # Clean up temporary file
-            if tmp_path and os.path.exists(tmp_path):
-                try:
-                    os.unlink(tmp_path)
-                except Exception:
-                    pass
-        
+
         return results
     
-    def _run_pylint(self, file_path: str) -> List[Dict[str, Any]]:
-        """Run pylint and parse results"""
+    def analyze_files(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Analyze many files with one batched tool invocation
+
+        pylint and bandit accept multiple paths per run, so a 20-file PR
+        costs 2 process starts instead of 40 - the interpreter and plugin
+        warmup is paid once and amortized across the whole batch. radon
+        stays in-process per file.
+
+        Args:
+            items: List of (file_path, file_content) tuples
+
+        Returns:
+            List of per-file analysis results in the same order as items
+        """
+        if not items:
+            return []
+
+        if len(items) == 1:
+            return [self.analyze_file(items[0][0], items[0][1])]
+
+        results_by_path = {}
+        pending = []
+
+        for file_path, file_content in items:
+            if not file_path.endswith('.py') or not file_content.strip():
+                results_by_path[file_path] = {
+                    'file': file_path,
+                    'style_issues': [],
+                    'security_issues': [],
+                    'complexity_issues': [],
+                    'summary': {}
+                }
+                continue
+
+            # Syntax errors take analyze_file's curated single-issue
+            # path (it returns before spawning any tools) instead of
+            # polluting the batch with unparseable files
+            try:
+                compile(file_content, file_path, 'exec')
+            except SyntaxError:
+                results_by_path[file_path] = self.analyze_file(file_path, file_content)
+                continue
+
+            cache_key = DiskCache.make_key(
+                content=hashlib.sha256(file_content.encode('utf-8')).hexdigest(),
+                tools=_TOOL_VERSIONS
+            )
+            cached = _static_cache.get(cache_key)
+            if cached is not None:
+                cached['file'] = file_path
+                results_by_path[file_path] = cached
+            else:
+                pending.append((file_path, file_content, cache_key))
+
+        if pending:
+            # Fresh subdirectory per call: concurrent batches must not
+            # share paths (see _batch_dir)
+            tmpdir = tempfile.mkdtemp(dir=_batch_dir())
+            try:
+                # Materialize the batch once so both tools can scan it in
+                # a single invocation
+                tmp_map = {}
+                for file_path, file_content, _ in pending:
+                    tmp_path = os.path.join(tmpdir, file_path)
+                    os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        f.write(file_content)
+                    tmp_map[os.path.abspath(tmp_path)] = file_path
+
+                tmp_paths = list(tmp_map)
+                style_by_tmp = self._run_pylint_batch(tmp_paths)
+                security_by_tmp = self._run_bandit_batch(tmp_paths)
+
+                # A failed tool run (None) taints the whole batch for
+                # caching purposes - its files still get whatever the
+                # other tools found, but nothing is persisted
+                batch_ok = style_by_tmp is not None and security_by_tmp is not None
+                style_by_tmp = style_by_tmp or {}
+                security_by_tmp = security_by_tmp or {}
+
+                for tmp_path, (file_path, file_content, cache_key) in zip(tmp_paths, pending):
+                    complexity = self._run_radon(file_content)
+                    results = {
+                        'file': file_path,
+                        'style_issues': style_by_tmp.get(tmp_path, []),
+                        'security_issues': security_by_tmp.get(tmp_path, []),
+                        'complexity_issues': complexity or [],
+                        'summary': {}
+                    }
+                    results['summary'] = {
+                        'total_issues': len(results['style_issues']) + len(results['security_issues']) + len(results['complexity_issues']),
+                        'style_count': len(results['style_issues']),
+                        'security_count': len(results['security_issues']),
+                        'complexity_count': len(results['complexity_issues'])
+                    }
+                    if batch_ok and complexity is not None:
+                        _static_cache.set(cache_key, results)
+                    results_by_path[file_path] = results
+
+            except Exception as e:
+                print(f"Batched static analysis failed, falling back to per-file: {e}")
+                for file_path, file_content, _ in pending:
+                    results_by_path[file_path] = self.analyze_file(file_path, file_content)
+            finally:
+                # This batch's subdirectory is private to it - remove
+                # the whole thing
+                shutil.rmtree(tmpdir, ignore_errors=True)
+
+        return [results_by_path[file_path] for file_path, _ in items]
+
+    def _run_pylint_batch(self, paths: List[str]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Run pylint once over many paths and partition issues by file
+
+        Returns:
+            Issues keyed by absolute path, or None when the run failed
+            (timeout, missing tool, unparseable output) so the caller
+            knows not to cache the results
+        """
+        by_path = {}
         try:
+            # -j 0 lets pylint shard the batch across all cores; the
+            # single-file stdin path stays serial since fork overhead
+            # would outweigh it there
             result = subprocess.run(
-                ['pylint', '--output-format=json', '--disable=C0114,C0115,C0116', file_path],
+                [sys.executable, '-I', '-m', 'pylint', '-j', '0', '--output-format=json', '--disable=C0114,C0115,C0116'] + paths,
                 capture_output=True,
-                text=True,
-                timeout=30
+                timeout=120,
+                env=_TOOL_ENV
             )
-            
+
+            if result.stdout:
+                for issue in _json_loads(result.stdout):
+                    if not issue.get('line'):
+                        continue
+                    issue_path = os.path.abspath(issue.get('path', ''))
+                    by_path.setdefault(issue_path, []).append({
+                        'line': issue.get('line', 0),
+                        'column': issue.get('column', 0),
+                        'type': issue.get('type', 'unknown'),
+                        'message': issue.get('message', ''),
+                        'symbol': issue.get('symbol', ''),
+                        'severity': self._map_pylint_severity(issue.get('type', ''))
+                    })
+
+        except subprocess.TimeoutExpired:
+            print("Pylint timeout")
+            return None
+        except ValueError as e:
+            print(f"Pylint JSON parse error: {e}")
+            return None
+        except FileNotFoundError:
+            print("Pylint not found - install with: pip install pylint")
+            return None
+        except Exception as e:
+            print(f"Pylint error: {e}")
+            return None
+
+        return by_path
+
+    def _run_bandit_batch(self, paths: List[str]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Run bandit once over many paths and partition issues by file
+
+        Returns:
+            Issues keyed by absolute path, or None when the run failed
+            so the caller knows not to cache the results
+        """
+        by_path = {}
+        try:
+            result = subprocess.run(
+                [sys.executable, '-I', '-m', 'bandit', '-f', 'json'] + paths,
+                capture_output=True,
+                timeout=120,
+                env=_TOOL_ENV
+            )
+
             if result.stdout:
-                issues = json.loads(result.stdout)
+                data = _json_loads(result.stdout)
+                for issue in data.get('results', []):
+                    issue_path = os.path.abspath(issue.get('filename', ''))
+                    by_path.setdefault(issue_path, []).append({
+                        'line': issue.get('line_number', 0),
+                        'type': 'security',
+                        'message': issue.get('issue_text', ''),
+                        'severity': issue.get('issue_severity', 'MEDIUM').lower(),
+                        'confidence': issue.get('issue_confidence', 'MEDIUM').lower(),
+                        'cwe': issue.get('issue_cwe', {}).get('id', 'N/A')
+                    })
+
+        except subprocess.TimeoutExpired:
+            print("Bandit timeout")
+            return None
+        except ValueError as e:
+            print(f"Bandit JSON parse error: {e}")
+            return None
+        except FileNotFoundError:
+            print("Bandit not found - install with: pip install bandit")
+            return None
+        except Exception as e:
+            print(f"Bandit error: {e}")
+            return None
+
+        return by_path
+
+    def _run_pylint(self, file_path: str, file_content: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run pylint with code piped over stdin and parse results
+
+        Returns:
+            Issue list, or None when the run failed (nothing cacheable)
+        """
+        try:
+            stdout = self._run_tool(
+                [sys.executable, '-I', '-m', 'pylint', '--from-stdin', file_path, '--output-format=json', '--disable=C0114,C0115,C0116'],
+                file_content
+            )
+
+            if stdout:
+                issues = _json_loads(stdout)
                 return [{
                     'line': issue.get('line', 0),
                     'column': issue.get('column', 0),
@@ -92,27 +420,31 @@ class StaticAnalyzer:
             
         except subprocess.TimeoutExpired:
             print("Pylint timeout")
-        except json.JSONDecodeError as e:
+            return None
+        except ValueError as e:
             print(f"Pylint JSON parse error: {e}")
+            return None
         except FileNotFoundError:
             print("Pylint not found - install with: pip install pylint")
+            return None
         except Exception as e:
             print(f"Pylint error: {e}")
-        
+            return None
+
         return []
-    
-    def _run_bandit(self, file_path: str) -> List[Dict[str, Any]]:
-        """Run bandit for security analysis"""
+
+    def _run_bandit(self, file_content: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run bandit for security analysis with code piped over stdin
+
+        Returns:
+            Issue list, or None when the run failed (nothing cacheable)
+        """
         try:
-            result = subprocess.run(
-                ['bandit', '-f', 'json', file_path],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.stdout:
-                data = json.loads(result.stdout)
+            stdout = self._run_tool([sys.executable, '-I', '-m', 'bandit', '-f', 'json', '-'], file_content)
+
+            if stdout:
+                data = _json_loads(stdout)
                 issues = data.get('results', [])
                 return [{
                     'line': issue.get('line_number', 0),
@@ -125,53 +457,79 @@ class StaticAnalyzer:
             
         except subprocess.TimeoutExpired:
             print("Bandit timeout")
-        except json.JSONDecodeError as e:
+            return None
+        except ValueError as e:
             print(f"Bandit JSON parse error: {e}")
+            return None
         except FileNotFoundError:
             print("Bandit not found - install with: pip install bandit")
+            return None
         except Exception as e:
             print(f"Bandit error: {e}")
-        
+            return None
+
         return []
     
-    def _run_radon(self, file_path: str) -> List[Dict[str, Any]]:
-        """Run radon for complexity analysis"""
+    @staticmethod
+    def _run_tool(args: List[str], file_content: str, timeout: int = 30) -> bytes:
+        """
+        Run an analysis tool and return its stdout
+
+        Uses Popen with communicate so stdin feeding and stdout/stderr
+        draining overlap with tool execution - large reports can't fill a
+        pipe buffer and stall the child process. Pipes stay in binary
+        mode; the JSON parser consumes the raw bytes.
+
+        Args:
+            args: Command line to execute
+            file_content: Code piped to the tool over stdin
+            timeout: Seconds before the child is killed
+
+        Returns:
+            The tool's stdout as bytes (empty on timeout/kill)
+        """
+        process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=_TOOL_ENV
+        )
         try:
-            result = subprocess.run(
-                ['radon', 'cc', '-j', file_path],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.stdout:
-                data = json.loads(result.stdout)
-                issues = []
-                
-                for file_data in data.values():
-                    for item in file_data:
-                        complexity = item.get('complexity', 0)
-                        if complexity > 10:  # Flag high complexity
-                            issues.append({
-                                'line': item.get('lineno', 0),
-                                'type': 'complexity',
-                                'message': f"High complexity ({complexity}) in {item.get('type', 'function')} '{item.get('name', 'unknown')}'",
-                                'severity': 'high' if complexity > 20 else 'medium',
-                                'complexity': complexity
-                            })
-                
-                return issues
-            
+            stdout, _ = process.communicate(input=file_content.encode('utf-8'), timeout=timeout)
+            return stdout
         except subprocess.TimeoutExpired:
-            print("Radon timeout")
-        except json.JSONDecodeError as e:
-            print(f"Radon JSON parse error: {e}")
-        except FileNotFoundError:
+            process.kill()
+            process.communicate()
+            raise
+
+    def _run_radon(self, file_content: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run radon complexity analysis in-process
+
+        radon is a pure library call, so visiting the code directly skips
+        an interpreter spawn entirely - complexity analysis drops from
+        hundreds of milliseconds to a few.
+
+        Returns:
+            Issue list, or None when the run failed (nothing cacheable)
+        """
+        try:
+            # Key the memo on a fast non-cryptographic hash so duplicate
+            # or unchanged file content skips the cc_visit pass entirely
+            code_hash = hashlib.blake2b(
+                file_content.encode('utf-8'), digest_size=16
+            ).hexdigest()
+            return list(_radon_issues_cached(code_hash, file_content))
+
+        except ImportError:
             print("Radon not found - install with: pip install radon")
+        except SyntaxError as e:
+            print(f"Radon could not parse file: {e}")
         except Exception as e:
             print(f"Radon error: {e}")
-        
-        return []
+
+        return None
     
     @staticmethod
     def _map_pylint_severity(issue_type: str) -> str:
@@ -183,4 +541,34 @@ class StaticAnalyzer:
             'convention': 'low',
             'info': 'info'
         }
-        return mapping.get(issue_type.lower(), 'medium')
\ No newline at end of file
+        return mapping.get(issue_type.lower(), 'medium')
+
+@functools.lru_cache(maxsize=1024)
+def _radon_issues_cached(code_hash: str, file_content: str) -> Tuple[Dict[str, Any], ...]:
+    """
+    Compute radon complexity issues, memoized by content hash
+
+    Args:
+        code_hash: BLAKE2 digest of file_content, checked first for
+            cheap cache-key comparison
+        file_content: The code to analyze
+
+    Returns:
+        Tuple of complexity issue dictionaries
+    """
+    from radon.complexity import cc_visit
+
+    issues = []
+    for block in cc_visit(file_content):
+        complexity = block.complexity
+        if complexity > 10:  # Flag high complexity
+            block_type = type(block).__name__.lower()
+            issues.append({
+                'line': block.lineno,
+                'type': 'complexity',
+                'message': f"High complexity ({complexity}) in {block_type} '{block.name}'",
+                'severity': 'high' if complexity > 20 else 'medium',
+                'complexity': complexity
+            })
+
+    return tuple(issues)
\ No newline at end of file
@@ -1,20 +1,96 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from config import Config
 from github_integration.webhook_handler import WebhookHandler
 from github_integration.pr_commenter import PRCommenter
 from analyzers.static_analyzer import StaticAnalyzer
 from analyzers.llm_analyzer import LLMAnalyzer
 from utils.helpers import fetch_pr_files, truncate_content, format_error_response
-import traceback
+from utils.cache import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+import atexit
+import hashlib
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Log records go onto an in-memory queue and a background listener
+# thread does the formatting and stream writes - the webhook and
+# per-file worker threads never block on stdout I/O
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, _log_stream, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+# QueueHandler.prepare() bakes this handler's formatting into the
+# record before it crosses the queue, so keep it to the bare message -
+# otherwise basicConfig attaches BASIC_FORMAT here and every line gets
+# formatted twice ("... INFO app: INFO:app: ...")
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+if orjson is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson (2-5x faster than stdlib)"""
+
+        @staticmethod
+        def dumps(obj, **kwargs):
+            return orjson.dumps(obj, default=DefaultJSONProvider.default).decode('utf-8')
+
+        @staticmethod
+        def loads(s, **kwargs):
+            return orjson.loads(s)
+
+    # Covers request.json on webhook payloads and every jsonify response
+    app.json = OrjsonProvider(app)
+
+# One Github client for the whole process - constructing it per request
+# allocates a fresh session and connection pool, losing keep-alive to
+# api.github.com
+from utils.github_client import client as github_client
+_github = github_client()
+
+# Configuration is environment-derived and immutable after startup -
+# validate once instead of on every /health probe
+try:
+    Config.validate()
+    _config_error = None
+except Exception as e:
+    _config_error = str(e)
+
 # Initialize components
 webhook_handler = WebhookHandler()
-pr_commenter = PRCommenter()
+pr_commenter = PRCommenter(github=_github)
 static_analyzer = StaticAnalyzer()
 llm_analyzer = LLMAnalyzer()
 
+# Bounded pool for whole-PR reviews. Requests are funneled through
+# here so a burst of webhook deliveries queues instead of spawning
+# unbounded concurrent pipelines (each one holds pylint/bandit/LLM
+# state). Drained on shutdown so in-flight reviews finish.
+_review_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+atexit.register(_review_executor.shutdown, wait=True)
+
+# Review results keyed by (path, content sha). On GitHub synchronize
+# events and webhook redeliveries the whole PR file list comes back
+# even though only a couple of files changed - unchanged files are
+# served from here, skipping both the analyzer subprocesses and the
+# LLM round trip. Bounded LRU with a 1h TTL so long-lived workers
+# don't grow without limit and stale reviews age out.
+_review_cache = TTLCache(maxsize=1024, ttl=3600)
+
 @app.route('/')
 def index():
     """Health check endpoint"""
@@ -30,163 +106,226 @@ def webhook():
     GitHub webhook endpoint for PR events
     """
     try:
-        print("\n" + "="*80)
-        print("WEBHOOK RECEIVED")
-        print("="*80)
-        
-        # Log headers
-        print("\nHeaders:")
-        print(f"  X-GitHub-Event: {request.headers.get('X-GitHub-Event')}")
-        sig = request.headers.get('X-Hub-Signature-256', '')
-        print(f"  X-Hub-Signature-256: {sig[:20]}..." if sig else "  X-Hub-Signature-256: None")
-        
+        event_type = request.headers.get('X-GitHub-Event')
+        logger.info("Webhook received: event=%s", event_type)
+        if logger.isEnabledFor(logging.DEBUG):
+            # Header dump is only worth formatting when DEBUG is on
+            logger.debug("Webhook headers: %s", dict(request.headers))
+
         # Verify webhook signature
-        print("\nVerifying signature...")
         if not webhook_handler.verify_signature(request):
-            print("SIGNATURE VERIFICATION FAILED!")
+            logger.warning("Webhook signature verification failed")
             return jsonify({'error': 'Invalid signature'}), 401
-        print("Signature verified!")
-        
-        # Parse payload
-        payload = request.json
-        event_type = request.headers.get('X-GitHub-Event')
-        
-        print(f"\nEvent Type: {event_type}")
-        print(f"Action: {payload.get('action')}")
-        
+
+        # Parse payload - a malformed body is the sender's fault, so
+        # answer 400 explicitly rather than letting it bubble into the
+        # catch-all below
+        payload = request.get_json(silent=True)
+        if payload is None:
+            logger.warning("Webhook payload is not valid JSON")
+            return jsonify({'error': 'Invalid JSON payload'}), 400
+
         # Only handle pull request events
         if event_type != 'pull_request':
-            print(f"Ignoring event type: {event_type}")
+            logger.info("Ignoring event type: %s", event_type)
             return jsonify({'message': 'Event ignored'}), 200
-        
+
         # Parse PR information
         pr_info = webhook_handler.parse_pull_request_event(payload)
-        
+
         if not pr_info:
-            print("PR action ignored (not opened/synchronized)")
+            logger.info("PR action ignored (not opened/synchronized): %s", payload.get('action'))
             return jsonify({'message': 'PR action ignored'}), 200
-        
-        print(f"\nProcessing PR:")
-        print(f"  Repo: {pr_info['repo_full_name']}")
-        print(f"  PR #: {pr_info['pr_number']}")
-        print(f"  Title: {pr_info['pr_title']}")
-        print(f"  Author: {pr_info['author']}")
-        
-        # Process PR review
-        review_result = process_pr_review(pr_info)
-        
-        print("\n" + "="*80)
-        print("WEBHOOK PROCESSING COMPLETE")
-        print("="*80 + "\n")
-        
-        return jsonify(review_result), 200
-        
+
+        logger.info(
+            "Processing PR %s#%s '%s' by %s",
+            pr_info['repo_full_name'], pr_info['pr_number'],
+            pr_info['pr_title'], pr_info['author']
+        )
+
+        # Hand the review to the bounded background pool and ack
+        # immediately - the full pipeline (static + LLM + posting) can
+        # take minutes, well past GitHub's 10s webhook delivery timeout
+        _review_executor.submit(process_pr_review, pr_info)
+
+        logger.info("Review queued for PR #%s", pr_info['pr_number'])
+        return jsonify({'accepted': True, 'pr_number': pr_info['pr_number']}), 202
+
     except Exception as e:
-        print("\n" + "="*80)
-        print("WEBHOOK ERROR")
-        print("="*80)
-        print(f"Error: {e}")
-        traceback.print_exc()
-        print("="*80 + "\n")
+        # Signature and payload problems answered 4xx above; anything
+        # reaching here is a bug on our side, so say so with a 500.
+        # (GitHub does not auto-redeliver failed deliveries - redelivery
+        # is manual from the webhook settings page either way.)
+        logger.exception("Webhook error: %s", e)
         return jsonify(format_error_response(str(e))), 500
 
+def _is_clean_enough(all_static_issues, static_results, content):
+    """
+    Decide whether a file is trivial enough to skip LLM review
+
+    True when static analysis found nothing, cyclomatic complexity is
+    trivial, and the file is short.
+    """
+    if all_static_issues:
+        return False
+    max_cc = max(
+        (i.get('complexity', 0) for i in static_results.get('complexity_issues', [])),
+        default=0
+    )
+    return max_cc <= 5 and len(content.splitlines()) < 50
+
+def _review_one(file_data, idx, total, static_results=None):
+    """
+    Run the full analysis pipeline for a single PR file
+
+    Args:
+        file_data: File dictionary with 'path' and 'content'
+        idx: 1-based position within the reviewable files (for logging)
+        total: Total number of reviewable files (for logging)
+        static_results: Precomputed static analysis for this file (from
+            the batched pass in process_pr_review); falls back to a
+            per-file run when absent
+
+    Returns:
+        Per-file review result dictionary
+    """
+    file_path = file_data['path']
+
+    cache_key = (file_path, hashlib.sha256(file_data['content'].encode('utf-8')).hexdigest())
+    cached = _review_cache.get(cache_key)
+    if cached is not None:
+        logger.info("[%d/%d] %s: unchanged since last run, reusing cached review", idx, total, file_path)
+        return cached
+
+    # Truncate content if too long
+    content, line_count = truncate_content(file_data['content'])
+
+    # Run static analysis (batched upstream in the normal path)
+    if static_results is None:
+        static_results = static_analyzer.analyze_file(file_path, content)
+
+    # Combine all static issues - single chained copy instead of the
+    # intermediate lists repeated + would allocate
+    all_static_issues = list(chain(
+        static_results.get('style_issues', []),
+        static_results.get('security_issues', []),
+        static_results.get('complexity_issues', [])
+    ))
+
+    # Run LLM analysis - skipped for short, clean, low-complexity
+    # files where it has nothing to add. The LLM call is the dominant
+    # wall-clock and dollar cost, and on tidy codebases this gate
+    # removes most of them.
+    if Config.LLM_SKIP_CLEAN_FILES and _is_clean_enough(all_static_issues, static_results, content):
+        llm_results = {'issues': [], 'overall_quality': 'good', 'summary': 'Skipped LLM analysis: no static issues and low complexity'}
+    else:
+        llm_results = llm_analyzer.analyze_code(
+            file_path,
+            content,
+            all_static_issues
+        )
+    llm_issue_count = len(llm_results.get('issues', []))
+
+    # One record per file instead of ~10 prints - keeps the hot loop off
+    # the stdout lock when workers run in parallel
+    logger.info(
+        "[%d/%d] %s: %d lines, %d static issues, %d LLM issues",
+        idx, total, file_path, line_count,
+        len(all_static_issues), llm_issue_count
+    )
+
+    # Combine results - extend in place rather than copying the static
+    # list a second time
+    all_issues = list(all_static_issues)
+    all_issues.extend(llm_results.get('issues', []))
+
+    result = {
+        'file': file_path,
+        'static_analysis': static_results,
+        'llm_analysis': llm_results,
+        'all_issues': all_issues,
+        'summary': {
+            'total_issues': len(all_issues),
+            'static_count': len(all_static_issues),
+            'llm_count': llm_issue_count
+        }
+    }
+    _review_cache.set(cache_key, result)
+    return result
+
 def process_pr_review(pr_info):
     """
     Process pull request review
-    
+
     Args:
         pr_info: PR information dictionary
-        
+
     Returns:
         Review result dictionary
     """
     try:
-        print(f"\nSTARTING REVIEW")
-        print(f"PR #{pr_info['pr_number']}: {pr_info['pr_title']}")
-        
-        # Fetch changed files
-        print("\nFetching changed files...")
-        files = fetch_pr_files(pr_info)
-        print(f"Found {len(files)} changed files")
-        
-        if not files:
-            print("No files to review")
+        logger.info("Starting review of PR #%s: %s", pr_info['pr_number'], pr_info['pr_title'])
+
+        # Fetch changed files - the reviewability filter is applied at
+        # listing time inside fetch_pr_files, so skipped paths never
+        # cost a content download
+        reviewable = fetch_pr_files(pr_info, path_filter=webhook_handler.should_review_file)
+        logger.info("Found %d reviewable changed files", len(reviewable))
+
+        if not reviewable:
+            logger.info("No files to review")
             return {
                 'success': True,
                 'message': 'No files to review',
                 'pr_number': pr_info['pr_number']
             }
-        
-        # Analyze each file
+
+        # Batched static pass first: pylint and bandit take many paths
+        # per invocation, so the whole PR costs two tool process starts
+        # instead of two per file. Files whose review is already cached
+        # are left out - their static results would be discarded.
+        pending_static = [
+            (f['path'], truncate_content(f['content'])[0])
+            for f in reviewable
+            if _review_cache.get(
+                (f['path'], hashlib.sha256(f['content'].encode('utf-8')).hexdigest())
+            ) is None
+        ]
+        static_by_path = {
+            r['file']: r for r in static_analyzer.analyze_files(pending_static)
+        }
+
+        # Analyze files concurrently - each one is dominated by
+        # independent LLM network time, so wall-clock drops to roughly
+        # the slowest file instead of the sum
         review_results = []
-        
-        for idx, file_data in enumerate(files, 1):
-            file_path = file_data['path']
-            
-            print(f"\n[{idx}/{len(files)}] Analyzing: {file_path}")
-            
-            # Skip non-reviewable files
-            if not webhook_handler.should_review_file(file_path):
-                print(f"  Skipped (non-reviewable file type)")
-                continue
-            
-            # Truncate content if too long
-            content = truncate_content(file_data['content'])
-            lines = content.count('\n')
-            print(f"  File size: {lines} lines")
-            
-            # Run static analysis
-            print(f"  Running static analysis...")
-            static_results = static_analyzer.analyze_file(file_path, content)
-            
-            # Combine all static issues
-            all_static_issues = (
-                static_results.get('style_issues', []) +
-                static_results.get('security_issues', []) +
-                static_results.get('complexity_issues', [])
-            )
-            print(f"  Found {len(all_static_issues)} static issues")
-            
-            # Run LLM analysis
-            print(f"  Running LLM analysis...")
-            llm_results = llm_analyzer.analyze_code(
-                file_path,
-                content,
-                all_static_issues
-            )
-            llm_issue_count = len(llm_results.get('issues', []))
-            print(f"  Found {llm_issue_count} LLM issues")
-            
-            # Combine results
-            all_issues = all_static_issues + llm_results.get('issues', [])
-            
-            review_results.append({
-                'file': file_path,
-                'static_analysis': static_results,
-                'llm_analysis': llm_results,
-                'all_issues': all_issues,
-                'summary': {
-                    'total_issues': len(all_issues),
-                    'static_count': len(all_static_issues),
-                    'llm_count': llm_issue_count
-                }
-            })
-        
-        print(f"\nANALYSIS COMPLETE")
-        print(f"  Total files analyzed: {len(review_results)}")
+
+        if reviewable:
+            with ThreadPoolExecutor(max_workers=min(8, len(reviewable))) as pool:
+                futures = [
+                    pool.submit(_review_one, file_data, idx, len(reviewable),
+                                static_by_path.get(file_data['path']))
+                    for idx, file_data in enumerate(reviewable, 1)
+                ]
+                # Collect in submission order so posted comments keep a
+                # stable file order
+                review_results = [f.result() for f in futures]
+
         total_issues = sum(r['summary']['total_issues'] for r in review_results)
-        print(f"  Total issues found: {total_issues}")
-        
+        logger.info(
+            "Analysis complete: %d files analyzed, %d issues found",
+            len(review_results), total_issues
+        )
+
         # Post review to GitHub
         if review_results:
-            print(f"\nPOSTING REVIEW TO GITHUB")
             success = pr_commenter.post_review(pr_info, review_results)
-            
+
             if success:
-                print("REVIEW POSTED SUCCESSFULLY!")
+                logger.info("Review posted successfully")
             else:
-                print("FAILED TO POST REVIEW")
-            
+                logger.error("Failed to post review")
+
             return {
                 'success': success,
                 'message': 'Review posted successfully' if success else 'Failed to post review',
@@ -195,46 +334,46 @@ def process_pr_review(pr_info):
                 'total_issues': total_issues
             }
         else:
-            print("No reviewable files found")
+            logger.info("No reviewable files found")
             return {
                 'success': True,
                 'message': 'No reviewable files found',
                 'pr_number': pr_info['pr_number']
             }
-        
+
     except Exception as e:
-        print(f"\nREVIEW PROCESSING ERROR: {e}")
-        traceback.print_exc()
+        logger.exception("Review processing error: %s", e)
         return format_error_response(str(e))
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    try:
-        Config.validate()
+    if _config_error is None:
         return jsonify({
             'status': 'healthy',
             'configuration': 'valid'
         }), 200
-    except Exception as e:
-        return jsonify({
-            'status': 'unhealthy',
-            'error': str(e)
-        }), 500
+    return jsonify({
+        'status': 'unhealthy',
+        'error': _config_error
+    }), 500
 
 @app.route('/test-github', methods=['GET'])
 def test_github():
     """Test GitHub API connection"""
     try:
-        from github import Github
-        g = Github(Config.GITHUB_TOKEN)
-        user = g.get_user()
-        
+        # get_user() is lazy; reading login issues the /user request.
+        # That must happen before rate_limiting, which is scraped from
+        # the last response's headers and falls back to a dedicated
+        # /rate_limit call when no request has been made yet.
+        user = _github.get_user()
+        username = user.login
+
         return jsonify({
             'status': 'success',
-            'username': user.login,
+            'username': username,
             'name': user.name,
-            'rate_limit': g.get_rate_limit().core.remaining
+            'rate_limit': _github.rate_limiting[0]
         }), 200
     except Exception as e:
         return jsonify({
@@ -244,34 +383,37 @@ def test_github():
 
 if __name__ == '__main__':
     try:
-        print("\n" + "="*80)
-        print("STARTING X-CODE AI CODE REVIEW ASSISTANT")
-        print("="*80)
-        
-        Config.validate()
-        print("Configuration validated")
-        
+        logger.info("Starting X-code AI Code Review Assistant")
+
+        if _config_error is not None:
+            raise ValueError(_config_error)
+        logger.info("Configuration validated")
+
         # Test GitHub connection
         try:
-            from github import Github
-            g = Github(Config.GITHUB_TOKEN)
-            user = g.get_user()
-            print(f"GitHub connected as: {user.login}")
-            print(f"Rate limit: {g.get_rate_limit().core.remaining}/5000")
+            # get_user() is lazy, so read login first to force the
+            # /user request - only then is rate_limiting scraped from
+            # its response headers instead of issuing a dedicated
+            # /rate_limit call
+            user = _github.get_user()
+            login = user.login
+            remaining, limit = _github.rate_limiting
+            logger.info(
+                "GitHub connected as %s (rate limit %s/%s)",
+                login, remaining, limit
+            )
         except Exception as e:
-            print(f"GitHub connection test failed: {e}")
-        
-        print(f"\nServer starting on port {Config.PORT}")
-        print(f"Webhook endpoint: http://localhost:{Config.PORT}/webhook")
-        print(f"Health check: http://localhost:{Config.PORT}/health")
-        print(f"GitHub test: http://localhost:{Config.PORT}/test-github")
-        print("="*80 + "\n")
-        
+            logger.warning("GitHub connection test failed: %s", e)
+
+        logger.info(
+            "Server starting on port %s (webhook: /webhook, health: /health, github test: /test-github)",
+            Config.PORT
+        )
+
         app.run(
             host='0.0.0.0',
             port=Config.PORT,
             debug=Config.FLASK_DEBUG
         )
     except Exception as e:
-        print(f"\nSTARTUP FAILED: {e}")
-        traceback.print_exc()
\ No newline at end of file
+        logger.exception("Startup failed: %s", e)
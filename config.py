@@ -23,6 +23,7 @@ class Config:
     MAX_FILES_TO_REVIEW = int(os.getenv('MAX_FILES_TO_REVIEW', 20))
     MAX_LINES_PER_FILE = int(os.getenv('MAX_LINES_PER_FILE', 500))
     ENABLE_AUTO_FIX = os.getenv('ENABLE_AUTO_FIX', 'True').lower() == 'true'
+    LLM_SKIP_CLEAN_FILES = os.getenv('LLM_SKIP_CLEAN_FILES', 'True').lower() == 'true'
     
     @staticmethod
     def validate():
@@ -1,13 +1,84 @@
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, List, Any
 from github import Github, GithubException
 from config import Config
+from utils.cache import TTLCache
+from utils.github_client import client as github_client
 import traceback
 
+# GitHub caps how much we post: 20 inline comments per review, 30 rows
+# in the fallback issue comment
+MAX_INLINE_COMMENTS = 20
+MAX_FALLBACK_ROWS = 30
+
+# Severity presentation constants, built once instead of per comment
+_SEVERITY_MARKERS = {
+    'high': '🔴 [HIGH]',
+    'medium': '🟡 [MEDIUM]',
+    'low': '🟢 [LOW]',
+    'info': '🔵 [INFO]'
+}
+_DEFAULT_MARKER = '⚠️ [ISSUE]'
+_ZERO_SEVERITY_COUNTS = MappingProxyType({'high': 0, 'medium': 0, 'low': 0})
+
+@lru_cache(maxsize=512)
+def _format_inline_comment_cached(marker: str, category: str, message: str,
+                                  suggestion: str, auto_fix: str,
+                                  enable_auto_fix: bool) -> str:
+    """
+    Build the Markdown body for one issue, memoized on its fields
+
+    Linter output repeats heavily across a PR (the same rule fires on
+    many lines/files), so most comments are a dict lookup instead of a
+    fresh string build.
+    """
+    # Build via list + join - repeated str += reallocates the whole
+    # string each time
+    parts = [f"{marker} **{category.upper()}**\n\n", f"{message}\n\n"]
+
+    if suggestion:
+        parts.append(f"**💡 Suggestion:** {suggestion}\n\n")
+
+    if auto_fix and enable_auto_fix:
+        parts.append(f"**🔧 Auto-fix:**\n```python\n{auto_fix}\n```\n\n")
+
+    parts.append("*🤖 Generated by X-code AI Code Review Assistant*")
+
+    return "".join(parts)
+
 class PRCommenter:
     """Handles posting comments on GitHub Pull Requests"""
     
-    def __init__(self):
-        self.github = Github(Config.GITHUB_TOKEN)
+    def __init__(self, github: Github = None):
+        # Accept an injected client for tests; defaults to the shared
+        # process singleton so the keep-alive connection pool is reused
+        # instead of every component opening its own sessions.
+        self.github = github or github_client()
+
+        # Repository objects are stable - cache them for the process
+        # lifetime. PR objects can change (new commits), so they get a
+        # short TTL, enough to cover the several calls within one
+        # review without re-fetching.
+        self._repo_cache: Dict[str, Any] = {}
+        self._pr_cache = TTLCache(maxsize=128, ttl=60)
+
+    def _get_repo(self, repo_full_name: str):
+        """Fetch a repository object, memoized per process"""
+        repo = self._repo_cache.get(repo_full_name)
+        if repo is None:
+            repo = self.github.get_repo(repo_full_name)
+            self._repo_cache[repo_full_name] = repo
+        return repo
+
+    def _get_pull(self, repo_full_name: str, pr_number: int):
+        """Fetch a PR object with a short-TTL cache"""
+        key = (repo_full_name, pr_number)
+        pr = self._pr_cache.get(key)
+        if pr is None:
+            pr = self._get_repo(repo_full_name).get_pull(pr_number)
+            self._pr_cache.set(key, pr)
+        return pr
     
     def post_review(self, pr_info: Dict[str, Any], review_results: List[Dict[str, Any]]) -> bool:
         """
@@ -21,26 +92,45 @@ class PRCommenter:
             True if successful, False otherwise
         """
         try:
-            repo = self.github.get_repo(pr_info['repo_full_name'])
-            pr = repo.get_pull(pr_info['pr_number'])
+            pr = self._get_pull(pr_info['repo_full_name'], pr_info['pr_number'])
             
-            # Prepare review comments
+            # Prepare review comments - severity tallies are folded
+            # into this single pass so the summary builder doesn't
+            # rescan every issue list
             comments = []
+            fallback_rows = []
             summary_parts = []
+            severity_counts = dict(_ZERO_SEVERITY_COUNTS)
             
             for result in review_results:
                 file_path = result['file']
                 
-                # Add inline comments for issues with valid line numbers
+                # Add inline comments for issues with valid line
+                # numbers. Each list stops at its own posting cap, and
+                # once both budgets are spent the loop only keeps
+                # tallying severities for the summary - no formatting,
+                # no dict allocation
                 for issue in result.get('all_issues', []):
                     line = issue.get('line', 0)
-                    if line > 0:
+                    inline_open = len(comments) < MAX_INLINE_COMMENTS
+                    fallback_open = len(fallback_rows) < MAX_FALLBACK_ROWS
+                    if line > 0 and (inline_open or fallback_open):
                         comment_body = self._format_inline_comment(issue)
-                        comments.append({
-                            'path': file_path,
-                            'line': line,
-                            'body': comment_body
-                        })
+                        if inline_open:
+                            comments.append({
+                                'path': file_path,
+                                'line': line,
+                                'body': comment_body
+                            })
+                        if fallback_open:
+                            # First line of the body, precomputed so the
+                            # fallback path doesn't re-split every comment
+                            fallback_rows.append(
+                                (file_path, line, comment_body.partition('\n')[0][:100])
+                            )
+                    sev = issue.get('severity', 'medium')
+                    if sev in severity_counts:
+                        severity_counts[sev] += 1
                 
                 # Add to summary
                 if result.get('summary', {}).get('total_issues', 0) > 0:
@@ -49,21 +139,19 @@ class PRCommenter:
                     )
             
             # Create review summary
-            summary = self._create_review_summary(pr_info, review_results, summary_parts)
+            summary = self._create_review_summary(pr_info, review_results, summary_parts, severity_counts)
             
             # Post review with proper error handling
             try:
                 if comments:
-                    # Limit comments to avoid API issues
-                    limited_comments = comments[:20]
+                    print(f"Posting review with {len(comments)} inline comments...")
                     
-                    print(f"Posting review with {len(limited_comments)} inline comments...")
-                    
-                    # Try to post as review with inline comments
+                    # Try to post as review with inline comments -
+                    # already capped during the build loop
                     pr.create_review(
                         body=summary,
                         event='COMMENT',
-                        comments=limited_comments
+                        comments=comments
                     )
                     print("Review with inline comments posted successfully!")
                 else:
@@ -82,17 +170,19 @@ class PRCommenter:
                 try:
                     print("Attempting fallback: posting as detailed issue comment...")
                     
-                    fallback_body = summary + "\n\n---\n\n"
-                    fallback_body += "**Note:** Failed to post inline comments. Here are the issues:\n\n"
+                    fallback_parts = [
+                        summary,
+                        "\n\n---\n\n",
+                        "**Note:** Failed to post inline comments. Here are the issues:\n\n"
+                    ]
                     
-                    # Add issue details to fallback comment
-                    for idx, comment_data in enumerate(comments[:30], 1):
-                        fallback_body += f"{idx}. **{comment_data['path']}** (Line {comment_data['line']})\n"
-                        # Extract first line of comment as preview
-                        preview = comment_data['body'].split('\n')[0][:100]
-                        fallback_body += f"   {preview}...\n\n"
+                    # Add issue details to fallback comment using the
+                    # previews computed during the build pass
+                    for idx, (path, line, preview) in enumerate(fallback_rows, 1):
+                        fallback_parts.append(f"{idx}. **{path}** (Line {line})\n")
+                        fallback_parts.append(f"   {preview}...\n\n")
                     
-                    pr.create_issue_comment(fallback_body)
+                    pr.create_issue_comment("".join(fallback_parts))
                     print("Fallback comment posted successfully!")
                     return True
                     
@@ -121,8 +211,8 @@ class PRCommenter:
             True if successful
         """
         try:
-            repo = self.github.get_repo(pr_info['repo_full_name'])
-            pr = repo.get_pull(pr_info['pr_number'])
+            repo = self._get_repo(pr_info['repo_full_name'])
+            pr = self._get_pull(pr_info['repo_full_name'], pr_info['pr_number'])
             commit = repo.get_commit(pr_info['head_sha'])
             
             # Post individual review comment
@@ -146,65 +236,54 @@ class PRCommenter:
     
     def _format_inline_comment(self, issue: Dict[str, Any]) -> str:
         """Format an issue as an inline comment"""
-        severity_marker = {
-            'high': '🔴 [HIGH]',
-            'medium': '🟡 [MEDIUM]',
-            'low': '🟢 [LOW]',
-            'info': '🔵 [INFO]'
-        }
-        
-        marker = severity_marker.get(issue.get('severity', 'medium'), '⚠️ [ISSUE]')
-        category = issue.get('category', issue.get('type', 'issue'))
-        message = issue.get('message', 'No description')
-        suggestion = issue.get('suggestion', '')
-        auto_fix = issue.get('auto_fix', '')
-        
-        comment = f"{marker} **{category.upper()}**\n\n"
-        comment += f"{message}\n\n"
-        
-        if suggestion:
-            comment += f"**💡 Suggestion:** {suggestion}\n\n"
-        
-        if auto_fix and Config.ENABLE_AUTO_FIX:
-            comment += f"**🔧 Auto-fix:**\n```python\n{auto_fix}\n```\n\n"
-        
-        comment += "*🤖 Generated by X-code AI Code Review Assistant*"
-        
-        return comment
+        marker = _SEVERITY_MARKERS.get(issue.get('severity', 'medium'), _DEFAULT_MARKER)
+        return _format_inline_comment_cached(
+            marker,
+            issue.get('category', issue.get('type', 'issue')),
+            issue.get('message', 'No description'),
+            issue.get('suggestion', ''),
+            issue.get('auto_fix', ''),
+            Config.ENABLE_AUTO_FIX
+        )
     
     def _create_review_summary(self, pr_info: Dict[str, Any], 
                                review_results: List[Dict[str, Any]],
-                               summary_parts: List[str]) -> str:
-        """Create a review summary comment"""
+                               summary_parts: List[str],
+                               severity_counts: Dict[str, int]) -> str:
+        """
+        Create a review summary comment
+
+        Args:
+            pr_info: PR information dictionary
+            review_results: List of analysis results per file
+            summary_parts: Pre-built per-file summary lines
+            severity_counts: Issue counts by severity, tallied by the
+                caller during its pass over the issues
+
+        Returns:
+            Markdown summary body
+        """
         total_issues = sum(r.get('summary', {}).get('total_issues', 0) for r in review_results)
         
-        summary = f"## 🤖 X-code AI Code Review\n\n"
-        summary += f"**PR:** {pr_info['pr_title']}\n"
-        summary += f"**Author:** @{pr_info['author']}\n"
-        summary += f"**Files Reviewed:** {len(review_results)}\n"
-        summary += f"**Total Issues Found:** {total_issues}\n\n"
+        parts = [
+            "## 🤖 X-code AI Code Review\n\n",
+            f"**PR:** {pr_info['pr_title']}\n",
+            f"**Author:** @{pr_info['author']}\n",
+            f"**Files Reviewed:** {len(review_results)}\n",
+            f"**Total Issues Found:** {total_issues}\n\n"
+        ]
         
         if total_issues > 0:
-            summary += "### 📊 Summary by File\n\n"
-            summary += "\n".join(summary_parts)
-            summary += "\n\n"
-            summary += "### 🎯 Issue Breakdown\n\n"
-            
-            # Count by severity
-            severity_counts = {'high': 0, 'medium': 0, 'low': 0}
-            for result in review_results:
-                for issue in result.get('all_issues', []):
-                    sev = issue.get('severity', 'medium')
-                    if sev in severity_counts:
-                        severity_counts[sev] += 1
-            
-            summary += f"- 🔴 High: {severity_counts['high']}\n"
-            summary += f"- 🟡 Medium: {severity_counts['medium']}\n"
-            summary += f"- 🟢 Low: {severity_counts['low']}\n\n"
+            parts.append("### 📊 Summary by File\n\n")
+            parts.append("\n".join(summary_parts))
+            parts.append("\n\n### 🎯 Issue Breakdown\n\n")
+            parts.append(f"- 🔴 High: {severity_counts['high']}\n")
+            parts.append(f"- 🟡 Medium: {severity_counts['medium']}\n")
+            parts.append(f"- 🟢 Low: {severity_counts['low']}\n\n")
         else:
-            summary += "✅ **No issues found! Great work!**\n\n"
+            parts.append("✅ **No issues found! Great work!**\n\n")
         
-        summary += "---\n"
-        summary += "*Powered by Groq Llama 3.3 70B + Static Analysis Tools*"
+        parts.append("---\n")
+        parts.append("*Powered by Groq Llama 3.3 70B + Static Analysis Tools*")
         
-        return summary
\ No newline at end of file
+        return "".join(parts)
\ No newline at end of file
@@ -1,9 +1,26 @@
+import functools
 import hmac
-import hashlib
+import os
 from typing import Dict, Any, Optional
 from flask import Request
 from config import Config
 
+# Built once at import - should_review_file runs per file per webhook,
+# so skip checks are O(1) hash lookups instead of rebuilding a pattern
+# list and scanning it with endswith each call
+_SKIP_EXTS = frozenset({
+    '.md', '.txt', '.json', '.yml', '.yaml',
+    '.lock', '.pyc',
+    '.png', '.jpg', '.jpeg', '.gif', '.svg',
+    '.pdf', '.zip', '.tar', '.gz', '.env'
+})
+_SKIP_NAMES = frozenset({'requirements.txt', '.gitignore', '.env'})
+
+@functools.lru_cache(maxsize=1)
+def _secret_bytes(secret: str) -> bytes:
+    """Webhook secret encoded once instead of per delivery"""
+    return secret.encode('utf-8')
+
 class WebhookHandler:
     """Handles GitHub webhook validation and processing"""
     
@@ -29,14 +46,18 @@ class WebhookHandler:
             print("Warning: No webhook secret configured")
             return False
         
-        # Calculate expected signature
+        # Calculate expected signature. get_data(cache=True) buffers
+        # the body once and leaves it cached for the request.json parse
+        # that follows, instead of materializing it twice. hmac.digest
+        # is the one-shot OpenSSL fast path - no Python-level HMAC
+        # object - and stays constant-time.
         try:
-            mac = hmac.new(
-                secret.encode('utf-8'),
-                msg=request.data,
-                digestmod=hashlib.sha256
+            digest = hmac.digest(
+                _secret_bytes(secret),
+                request.get_data(cache=True),
+                'sha256'
             )
-            expected_signature = 'sha256=' + mac.hexdigest()
+            expected_signature = 'sha256=' + digest.hex()
             
             # Compare signatures
             return hmac.compare_digest(expected_signature, signature)
@@ -101,16 +122,11 @@ class WebhookHandler:
             True if file should be reviewed
         """
         # Review Python files
-        if file_path.endswith('.py'):
-            return True
-        
+        ext = os.path.splitext(file_path)[1]
+        if ext == '.py':
+            return '__pycache__' not in file_path
+
         # Skip common non-code files
-        skip_patterns = [
-            '.md', '.txt', '.json', '.yml', '.yaml',
-            '.lock', '.pyc', '__pycache__',
-            'requirements.txt', '.gitignore', '.env',
-            '.png', '.jpg', '.jpeg', '.gif', '.svg',
-            '.pdf', '.zip', '.tar', '.gz'
-        ]
-        
-        return not any(file_path.endswith(pattern) or pattern in file_path for pattern in skip_patterns)
\ No newline at end of file
+        if ext in _SKIP_EXTS:
+            return False
+        return os.path.basename(file_path) not in _SKIP_NAMES and '__pycache__' not in file_path
\ No newline at end of file
@@ -4,8 +4,8 @@ Test script to post a test comment to a PR
 Usage: python test_comment.py owner/repo pr_number
 Example: python test_comment.py abhi3114-glitch/X-CODE 1
 """
-from github import Github
 from config import Config
+from utils.github_client import client as github_client
 import sys
 
 def post_test_comment(repo_name, pr_number):
@@ -14,7 +14,7 @@ def post_test_comment(repo_name, pr_number):
         print(f"\n📝 Posting test comment to PR #{pr_number} in {repo_name}...")
         
         Config.validate()
-        g = Github(Config.GITHUB_TOKEN)
+        g = github_client()
         
         repo = g.get_repo(repo_name)
         pr = repo.get_pull(pr_number)
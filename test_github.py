@@ -2,8 +2,8 @@
 """
 Test script to verify GitHub API connection and permissions
 """
-from github import Github
 from config import Config
+from utils.github_client import client as github_client
 import sys
 
 def test_github_connection():
@@ -20,7 +20,7 @@ def test_github_connection():
         
         # Connect to GitHub
         print("\n2. Connecting to GitHub...")
-        g = Github(Config.GITHUB_TOKEN)
+        g = github_client()
         user = g.get_user()
         print(f"   ✅ Connected as: {user.login}")
         print(f"   ✅ Name: {user.name}")
@@ -69,7 +69,7 @@ def test_pr_access(repo_name, pr_number):
     try:
         print(f"\nTesting access to PR #{pr_number} in {repo_name}...")
         
-        g = Github(Config.GITHUB_TOKEN)
+        g = github_client()
         repo = g.get_repo(repo_name)
         pr = repo.get_pull(pr_number)
         
@@ -3,224 +3,330 @@
 Complete GitHub Permission Test Script for X-code
 Tests all required permissions for the bot to work
 """
-from github import Github
 from config import Config
+from utils.github_client import client as github_client
+from datetime import datetime
+import io
+import itertools
+import logging
 import sys
 
-def test_all_permissions():
-    """Test all required GitHub permissions"""
-    
-    print("\n" + "="*80)
-    print("🔐 GITHUB PERMISSIONS TEST FOR X-CODE")
-    print("="*80)
-    
-    all_passed = True
-    
+# All test output collects in one in-memory buffer and hits stdout with
+# a single write at the end - one syscall instead of ~40 flushed print
+# lines, and machine callers can suppress it entirely with --quiet
+_log_buffer = io.StringIO()
+log = logging.getLogger('xcode.permtest')
+_handler = logging.StreamHandler(_log_buffer)
+_handler.setFormatter(logging.Formatter('%(message)s'))
+log.addHandler(_handler)
+log.setLevel(logging.INFO)
+log.propagate = False
+
+def _emit_log(quiet: bool = False) -> None:
+    """Flush the buffered test output to stdout in one write"""
+    if not quiet:
+        sys.stdout.write(_log_buffer.getvalue())
+        sys.stdout.flush()
+
+class _TestContext:
+    """Shared state threaded through the permission tests
+
+    Each test reads what earlier tests already fetched (user, repo
+    list, candidate PR) instead of re-requesting it from the API.
+    """
+
+    def __init__(self, github):
+        self.github = github
+        self.user = None
+        self.rate_remaining = None
+        self.rate_limit_total = None
+        self.rate_reset = None
+        self.repos_paginated = None
+        self.repos = []
+        self.test_repo = None
+        self.test_pr = None
+
+    def prime(self):
+        """Fetch the authenticated user and note the quota once
+
+        Every GitHub response carries X-RateLimit-Remaining, and
+        PyGithub scrapes it into rate_limiting - so after the /user
+        request the quota is known for free, without spending a
+        request on the dedicated /rate_limit endpoint. get_user() is
+        lazy and issues no request by itself (and rate_limiting falls
+        back to calling /rate_limit when no response has been seen
+        yet), so an attribute access forces the request first.
+        """
+        self.user = self.github.get_user()
+        _ = self.user.login  # materialize the lazy /user request
+        self.rate_remaining, self.rate_limit_total = self.github.rate_limiting
+        self.rate_reset = self.github.rate_limiting_resettime
+
+def _test_connection(ctx):
+    """Test 1: basic GitHub connection"""
+    log.info(f"   ✅ Connected as: {ctx.user.login}")
+    log.info(f"   ✅ Email: {ctx.user.email}")
+    return True
+
+def _test_rate_limits(ctx):
+    """Test 2: API rate limits (scraped from response headers)"""
+    log.info(f"   ✅ Core API: {ctx.rate_remaining}/{ctx.rate_limit_total} requests remaining")
+    log.info(f"   ℹ️  (read from response headers - no extra API request spent)")
+
+    if ctx.rate_remaining < 100:
+        log.info(f"   ⚠️  Warning: Low rate limit! You have {ctx.rate_remaining} requests left")
+    return True
+
+def _test_repo_access(ctx):
+    """Test 3: repository access"""
+    # One paginated listing shared with the PR test: islice pulls just
+    # the first page and totalCount resolves without iterating every
+    # page (the old len(list(...)) walked the full repo list twice)
+    ctx.repos_paginated = ctx.user.get_repos()
+    ctx.repos = list(itertools.islice(ctx.repos_paginated, 5))
+    if not ctx.repos:
+        log.info("   ❌ Cannot access any repositories")
+        return False
+    log.info(f"   ✅ Can access repositories ({ctx.repos_paginated.totalCount} total)")
+    for repo in ctx.repos:
+        log.info(f"      - {repo.full_name}")
+    return True
+
+def _test_pr_access(ctx):
+    """Test 4: pull request access"""
+    # One Search API call instead of walking every repo and listing
+    # its PRs - O(repos) round-trips become O(1)
     try:
-        # Test 1: Basic Connection
-        print("\n1️⃣  Testing basic GitHub connection...")
-        g = Github(Config.GITHUB_TOKEN)
-        user = g.get_user()
-        print(f"   ✅ Connected as: {user.login}")
-        print(f"   ✅ Email: {user.email}")
-        
-        # Test 2: Rate Limits
-        print("\n2️⃣  Checking API rate limits...")
-        rate_limit = g.get_rate_limit()
-        print(f"   ✅ Core API: {rate_limit.core.remaining}/{rate_limit.core.limit} requests remaining")
-        print(f"   ✅ Search API: {rate_limit.search.remaining}/{rate_limit.search.limit} requests remaining")
-        
-        if rate_limit.core.remaining < 100:
-            print(f"   ⚠️  Warning: Low rate limit! You have {rate_limit.core.remaining} requests left")
-        
-        # Test 3: Repository Access
-        print("\n3️⃣  Testing repository access...")
-        repos = list(user.get_repos())[:5]
-        if repos:
-            print(f"   ✅ Can access repositories ({len(list(user.get_repos()))} total)")
-            for repo in repos:
-                print(f"      - {repo.full_name}")
-        else:
-            print("   ❌ Cannot access any repositories")
-            all_passed = False
-        
-        # Test 4: Pull Request Access
-        print("\n4️⃣  Testing pull request access...")
-        pr_found = False
-        test_repo = None
-        test_pr = None
-        
-        for repo in user.get_repos():
+        results = ctx.github.search_issues(f"author:{ctx.user.login} is:pr", sort="created", order="desc")
+        first = next(iter(results), None)
+        if first is not None:
+            ctx.test_repo = first.repository
+            ctx.test_pr = ctx.test_repo.get_pull(first.number)
+            log.info(f"   ✅ Can read PRs from: {ctx.test_repo.full_name}")
+            log.info(f"      Found PR #{ctx.test_pr.number}: {ctx.test_pr.title}")
+    except Exception:
+        # Search quota exhausted or unavailable - fall back to
+        # scanning the already-fetched repo list
+        for repo in ctx.repos_paginated:
             try:
                 prs = list(repo.get_pulls(state='all'))
                 if prs:
-                    test_repo = repo
-                    test_pr = prs[0]
-                    pr_found = True
-                    print(f"   ✅ Can read PRs from: {repo.full_name}")
-                    print(f"      Found PR #{test_pr.number}: {test_pr.title}")
+                    ctx.test_repo = repo
+                    ctx.test_pr = prs[0]
+                    log.info(f"   ✅ Can read PRs from: {repo.full_name}")
+                    log.info(f"      Found PR #{ctx.test_pr.number}: {ctx.test_pr.title}")
                     break
             except:
                 continue
-        
-        if not pr_found:
-            print("   ⚠️  No PRs found in your repositories")
-            print("      This is OK - create a test PR to fully test permissions")
-        
-        # Test 5: Comment Posting Permission (if PR exists)
-        if test_pr:
-            print("\n5️⃣  Testing comment posting permission...")
-            print(f"   Attempting to post test comment to PR #{test_pr.number}...")
-            
-            try:
-                comment = test_pr.create_issue_comment("🤖 **X-code Permission Test**\n\nThis is an automated test to verify the bot can post comments.\n\n✅ If you see this, permissions are working correctly!\n\n*You can delete this comment.*")
-                print(f"   ✅ Successfully posted comment!")
-                print(f"   ✅ Comment URL: {comment.html_url}")
-                
-                # Clean up - try to delete the test comment
-                try:
-                    print(f"   🧹 Cleaning up test comment...")
-                    comment.delete()
-                    print(f"   ✅ Test comment deleted")
-                except:
-                    print(f"   ℹ️  Could not delete comment (you can delete it manually)")
-                    
-            except Exception as e:
-                print(f"   ❌ FAILED to post comment: {e}")
-                print(f"   ❌ This is a CRITICAL issue - the bot won't work!")
+
+    if ctx.test_pr is None:
+        log.info("   ⚠️  No PRs found in your repositories")
+        log.info("      This is OK - create a test PR to fully test permissions")
+    return True
+
+def _test_comment_posting(ctx):
+    """Test 5: comment posting permission (if a PR exists)"""
+    if ctx.test_pr is None:
+        log.info("   Skipping comment test (no PRs available)")
+        log.info("   ℹ️  To fully test, create a PR in one of your repos")
+        return True
+
+    log.info(f"   Attempting to post test comment to PR #{ctx.test_pr.number}...")
+    try:
+        comment = ctx.test_pr.create_issue_comment("🤖 **X-code Permission Test**\n\nThis is an automated test to verify the bot can post comments.\n\n✅ If you see this, permissions are working correctly!\n\n*You can delete this comment.*")
+        log.info(f"   ✅ Successfully posted comment!")
+        log.info(f"   ✅ Comment URL: {comment.html_url}")
+
+        # Clean up - try to delete the test comment
+        try:
+            log.info(f"   🧹 Cleaning up test comment...")
+            comment.delete()
+            log.info(f"   ✅ Test comment deleted")
+        except:
+            log.info(f"   ℹ️  Could not delete comment (you can delete it manually)")
+        return True
+
+    except Exception as e:
+        log.info(f"   ❌ FAILED to post comment: {e}")
+        log.info(f"   ❌ This is a CRITICAL issue - the bot won't work!")
+
+        if "403" in str(e):
+            log.info("\n   💡 FIX: Your token needs 'write:discussion' scope")
+            log.info("      1. Go to: https://github.com/settings/tokens")
+            log.info("      2. Delete current token")
+            log.info("      3. Create new token with these scopes:")
+            log.info("         ✅ repo (all)")
+            log.info("         ✅ write:discussion")
+        elif "404" in str(e):
+            log.info("\n   💡 FIX: Your token needs 'repo' scope")
+        return False
+
+def _test_webhook_secret(ctx):
+    """Test 6: webhook secret configuration"""
+    if not Config.GITHUB_WEBHOOK_SECRET:
+        log.info("   ❌ Webhook secret is NOT configured!")
+        log.info("   ❌ Add GITHUB_WEBHOOK_SECRET to your .env file")
+        return False
+    log.info(f"   ✅ Webhook secret is configured")
+    log.info(f"   ✅ Secret length: {len(Config.GITHUB_WEBHOOK_SECRET)} characters")
+    if len(Config.GITHUB_WEBHOOK_SECRET) < 10:
+        log.info(f"   ⚠️  Warning: Secret is short. Recommend 20+ characters for security")
+    return True
+
+def _test_groq_key(ctx):
+    """Test 7: Groq API configuration"""
+    if not Config.GROQ_API_KEY:
+        log.info("   ❌ Groq API key is NOT configured!")
+        log.info("   ❌ Add GROQ_API_KEY to your .env file")
+        return False
+    log.info(f"   ✅ Groq API key is configured")
+    if Config.GROQ_API_KEY.startswith('gsk_'):
+        log.info(f"   ✅ API key format looks correct")
+    else:
+        log.info(f"   ⚠️  API key doesn't start with 'gsk_' - verify it's correct")
+    return True
+
+# (banner, test function, critical) - critical failures abort the run
+# since everything downstream depends on them
+_TESTS = [
+    ("1️⃣  Testing basic GitHub connection...", _test_connection, True),
+    ("2️⃣  Checking API rate limits...", _test_rate_limits, False),
+    ("3️⃣  Testing repository access...", _test_repo_access, True),
+    ("4️⃣  Testing pull request access...", _test_pr_access, False),
+    ("5️⃣  Testing comment posting permission...", _test_comment_posting, False),
+    ("6️⃣  Checking webhook secret configuration...", _test_webhook_secret, False),
+    ("7️⃣  Checking Groq API configuration...", _test_groq_key, False),
+]
+
+def test_all_permissions():
+    """Test all required GitHub permissions"""
+
+    log.info("\n" + "="*80)
+    log.info("🔐 GITHUB PERMISSIONS TEST FOR X-CODE")
+    log.info("="*80)
+
+    all_passed = True
+    ctx = _TestContext(github_client())
+
+    try:
+        ctx.prime()
+
+        # Abort before burning requests the token can't spare - the
+        # comment post/delete and repo listing below would fail with
+        # opaque 403s anyway
+        if ctx.rate_remaining < 10:
+            log.info(f"\n❌ Only {ctx.rate_remaining} API requests remaining - too few to run the tests")
+            log.info(f"   Rate limit resets at: {datetime.fromtimestamp(ctx.rate_reset)}")
+            log.info("   Wait for the reset and run this script again")
+            return False
+
+        for banner, test_fn, critical in _TESTS:
+            log.info(f"\n{banner}")
+            if not test_fn(ctx):
                 all_passed = False
-                
-                if "403" in str(e):
-                    print("\n   💡 FIX: Your token needs 'write:discussion' scope")
-                    print("      1. Go to: https://github.com/settings/tokens")
-                    print("      2. Delete current token")
-                    print("      3. Create new token with these scopes:")
-                    print("         ✅ repo (all)")
-                    print("         ✅ write:discussion")
-                elif "404" in str(e):
-                    print("\n   💡 FIX: Your token needs 'repo' scope")
-        else:
-            print("\n5️⃣  Skipping comment test (no PRs available)")
-            print("   ℹ️  To fully test, create a PR in one of your repos")
-        
-        # Test 6: Webhook Secret
-        print("\n6️⃣  Checking webhook secret configuration...")
-        if Config.GITHUB_WEBHOOK_SECRET:
-            print(f"   ✅ Webhook secret is configured")
-            print(f"   ✅ Secret length: {len(Config.GITHUB_WEBHOOK_SECRET)} characters")
-            if len(Config.GITHUB_WEBHOOK_SECRET) < 10:
-                print(f"   ⚠️  Warning: Secret is short. Recommend 20+ characters for security")
-        else:
-            print("   ❌ Webhook secret is NOT configured!")
-            print("   ❌ Add GITHUB_WEBHOOK_SECRET to your .env file")
-            all_passed = False
-        
-        # Test 7: Groq API Key
-        print("\n7️⃣  Checking Groq API configuration...")
-        if Config.GROQ_API_KEY:
-            print(f"   ✅ Groq API key is configured")
-            if Config.GROQ_API_KEY.startswith('gsk_'):
-                print(f"   ✅ API key format looks correct")
-            else:
-                print(f"   ⚠️  API key doesn't start with 'gsk_' - verify it's correct")
-        else:
-            print("   ❌ Groq API key is NOT configured!")
-            print("   ❌ Add GROQ_API_KEY to your .env file")
-            all_passed = False
-        
+                if critical:
+                    log.info("   ❌ Critical test failed - aborting remaining tests")
+                    break
+
         # Final Summary
-        print("\n" + "="*80)
+        log.info("\n" + "="*80)
         if all_passed:
-            print("✅ ALL TESTS PASSED - X-CODE IS READY TO USE!")
-            print("="*80)
-            print("\n📋 Next Steps:")
-            print("   1. Start your app: python app.py")
-            print("   2. Start ngrok: ngrok http 5000")
-            print("   3. Configure webhook in GitHub")
-            print("   4. Create a test PR")
-            print("\n🎉 Your bot should work perfectly!\n")
+            log.info("✅ ALL TESTS PASSED - X-CODE IS READY TO USE!")
+            log.info("="*80)
+            log.info("\n📋 Next Steps:")
+            log.info("   1. Start your app: python app.py")
+            log.info("   2. Start ngrok: ngrok http 5000")
+            log.info("   3. Configure webhook in GitHub")
+            log.info("   4. Create a test PR")
+            log.info("\n🎉 Your bot should work perfectly!\n")
             return True
         else:
-            print("❌ SOME TESTS FAILED - PLEASE FIX THE ISSUES ABOVE")
-            print("="*80)
-            print("\n📋 Required Actions:")
-            print("   1. Fix the failed tests above")
-            print("   2. Run this script again to verify")
-            print("   3. Check the fix suggestions (💡) for each error\n")
+            log.info("❌ SOME TESTS FAILED - PLEASE FIX THE ISSUES ABOVE")
+            log.info("="*80)
+            log.info("\n📋 Required Actions:")
+            log.info("   1. Fix the failed tests above")
+            log.info("   2. Run this script again to verify")
+            log.info("   3. Check the fix suggestions (💡) for each error\n")
             return False
-            
+
     except Exception as e:
-        print(f"\n❌ FATAL ERROR: {e}")
+        log.info(f"\n❌ FATAL ERROR: {e}")
         import traceback
-        traceback.print_exc()
-        
-        print("\n" + "="*80)
-        print("❌ TEST FAILED")
-        print("="*80)
-        print("\nCommon Issues:")
-        print("1. Invalid GITHUB_TOKEN in .env file")
-        print("2. Token expired or revoked")
-        print("3. Token missing required scopes")
-        print("\nTo fix:")
-        print("1. Go to: https://github.com/settings/tokens")
-        print("2. Create new token with:")
-        print("   ✅ repo (all sub-scopes)")
-        print("   ✅ write:discussion")
-        print("3. Update GITHUB_TOKEN in .env file")
-        print("4. Run this test again\n")
-        
+        log.info(traceback.format_exc())
+
+        log.info("\n" + "="*80)
+        log.info("❌ TEST FAILED")
+        log.info("="*80)
+        log.info("\nCommon Issues:")
+        log.info("1. Invalid GITHUB_TOKEN in .env file")
+        log.info("2. Token expired or revoked")
+        log.info("3. Token missing required scopes")
+        log.info("\nTo fix:")
+        log.info("1. Go to: https://github.com/settings/tokens")
+        log.info("2. Create new token with:")
+        log.info("   ✅ repo (all sub-scopes)")
+        log.info("   ✅ write:discussion")
+        log.info("3. Update GITHUB_TOKEN in .env file")
+        log.info("4. Run this test again\n")
+
         return False
 
 def test_specific_repo(repo_name, pr_number=None):
     """Test permissions on a specific repository"""
-    
-    print(f"\n🔍 Testing specific repo: {repo_name}")
-    print("="*80)
-    
+
+    log.info(f"\n🔍 Testing specific repo: {repo_name}")
+    log.info("="*80)
+
     try:
-        g = Github(Config.GITHUB_TOKEN)
+        g = github_client()
         repo = g.get_repo(repo_name)
-        
-        print(f"✅ Can access repo: {repo.full_name}")
-        print(f"   Description: {repo.description}")
-        print(f"   Private: {repo.private}")
-        
+
+        log.info(f"✅ Can access repo: {repo.full_name}")
+        log.info(f"   Description: {repo.description}")
+        log.info(f"   Private: {repo.private}")
+
         # Test PR access
         if pr_number:
             try:
                 pr = repo.get_pull(pr_number)
-                print(f"\n✅ Can access PR #{pr_number}")
-                print(f"   Title: {pr.title}")
-                print(f"   Author: {pr.user.login}")
-                print(f"   State: {pr.state}")
-                
+                log.info(f"\n✅ Can access PR #{pr_number}")
+                log.info(f"   Title: {pr.title}")
+                log.info(f"   Author: {pr.user.login}")
+                log.info(f"   State: {pr.state}")
+
                 # Test comment
-                print(f"\n📝 Attempting to post test comment...")
+                log.info(f"\n📝 Attempting to post test comment...")
                 comment = pr.create_issue_comment("🧪 Test comment from X-code\n\nPermission test successful! ✅\n\n*You can delete this.*")
-                print(f"✅ Comment posted: {comment.html_url}")
-                
+                log.info(f"✅ Comment posted: {comment.html_url}")
+
                 return True
-                
+
             except Exception as e:
-                print(f"❌ Error with PR: {e}")
+                log.info(f"❌ Error with PR: {e}")
                 return False
         else:
-            print(f"\nℹ️  No PR number provided - skipping PR test")
-            print(f"   Usage: python test_permissions.py {repo_name} <pr_number>")
+            log.info(f"\nℹ️  No PR number provided - skipping PR test")
+            log.info(f"   Usage: python test_permissions.py {repo_name} <pr_number>")
             return True
-            
+
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log.info(f"❌ Error: {e}")
         return False
 
 if __name__ == '__main__':
-    # If arguments provided, test specific repo
-    if len(sys.argv) >= 2:
-        repo_name = sys.argv[1]
-        pr_number = int(sys.argv[2]) if len(sys.argv) >= 3 else None
-        success = test_specific_repo(repo_name, pr_number)
-    else:
-        # Otherwise run full test suite
-        success = test_all_permissions()
-    
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    quiet = '--quiet' in sys.argv
+    args = [a for a in sys.argv[1:] if a != '--quiet']
+
+    try:
+        # If arguments provided, test specific repo
+        if args:
+            repo_name = args[0]
+            pr_number = int(args[1]) if len(args) >= 2 else None
+            success = test_specific_repo(repo_name, pr_number)
+        else:
+            # Otherwise run full test suite
+            success = test_all_permissions()
+    finally:
+        _emit_log(quiet)
+
+    sys.exit(0 if success else 1)
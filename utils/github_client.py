@@ -0,0 +1,16 @@
+from functools import lru_cache
+from github import Github
+from config import Config
+
+@lru_cache(maxsize=1)
+def client() -> Github:
+    """
+    Process-wide Github client singleton
+
+    Every Github() instance owns its own requests.Session, so ad-hoc
+    construction per call site pays a fresh TLS handshake and loses
+    connection keep-alive. All code should go through here; per_page
+    and pool_size are tuned for the parallel review workers, and
+    transient failures retry at the transport layer.
+    """
+    return Github(Config.GITHUB_TOKEN, per_page=100, retry=3, pool_size=16)
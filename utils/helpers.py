@@ -1,105 +1,520 @@
+import copy
+import functools
+import json
 import requests
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, List, Dict, Any, Optional
 from config import Config
-import time
+from utils.cache import TTLCache
 
-def fetch_pr_files(pr_info: Dict[str, Any], max_retries: int = 3) -> List[Dict[str, str]]:
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Public interface - everything else in here (session, caches, GraphQL
+# plumbing) is an implementation detail subject to change
+__all__ = [
+    'fetch_pr_files',
+    'list_pr_files',
+    'fetch_file_content',
+    'truncate_content',
+    'format_error_response',
+    'rate_limit_remaining',
+]
+
+def _json_loads(data):
+    """Parse JSON with orjson when available (3-5x faster than stdlib)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+_GRAPHQL_URL = 'https://api.github.com/graphql'
+
+# Shared session so every GitHub call here reuses pooled keep-alive
+# connections instead of a fresh TCP+TLS handshake per request. Sized
+# for the parallel per-file workers. PyGithub keeps its own session
+# inside the app-level client singleton.
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504))
+)
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
+# ETag conditional-request cache keyed on URL. GitHub serves 304 Not
+# Modified for free (no rate-limit cost) when the resource is
+# unchanged, which covers webhook redeliveries and re-reviews of the
+# same PR state. Sized to hold the raw blobs of ~100 concurrently
+# active PRs (MAX_FILES_TO_REVIEW files each); entries are URL-keyed
+# so file listings and per-file content share the one cache.
+_etag_cache = TTLCache(maxsize=2048, ttl=3600)
+
+# Constant request headers, built once. A stable User-Agent matters
+# beyond cosmetics: GitHub's abuse detection is harsher on
+# missing/default UAs, which raises the odds of 429s.
+_HEADERS = {
+    'Authorization': f'token {Config.GITHUB_TOKEN}',
+    'Accept': 'application/vnd.github.v3+json',
+    'User-Agent': 'x-code-bot'
+}
+_GRAPHQL_HEADERS = {
+    'Authorization': f'bearer {Config.GITHUB_TOKEN}',
+    'Accept': 'application/json',
+    'User-Agent': 'x-code-bot'
+}
+_RAW_HEADERS = {'User-Agent': 'x-code-bot'}
+
+# Last X-RateLimit-Remaining seen on any GitHub response
+_rate_limit_remaining = None
+
+def _note_rate_limit(response) -> None:
+    """Record X-RateLimit-Remaining and warn when it runs low"""
+    global _rate_limit_remaining
+
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    if remaining is not None:
+        _rate_limit_remaining = int(remaining)
+        if _rate_limit_remaining < 100:
+            print(f"Warning: GitHub rate limit low ({_rate_limit_remaining} remaining)")
+
+def rate_limit_remaining() -> Optional[int]:
     """
-    Fetch changed files from a pull request with retry logic
-    
+    Remaining GitHub API quota as scraped from response headers
+
+    Every GitHub response already carries X-RateLimit-Remaining, so
+    this costs nothing - unlike the /rate_limit endpoint, which spends
+    a request to ask. None until the first GitHub call has been made.
+    """
+    return _rate_limit_remaining
+
+def _conditional_get(url: str, headers: Dict[str, str] = None, timeout: int = 30) -> Optional[str]:
+    """
+    GET a URL with ETag revalidation
+
+    Sends If-None-Match when the URL was fetched before; a 304 answer
+    serves the cached body without counting against the rate limit.
+
+    Args:
+        url: URL to fetch
+        headers: Extra request headers
+        timeout: Request timeout in seconds
+
+    Returns:
+        Response body text, or None on a non-2xx answer
+    """
+    request_headers = dict(headers) if headers else {}
+    cached = _etag_cache.get(url)
+    if cached is not None:
+        request_headers['If-None-Match'] = cached[0]
+
+    response = _session.get(url, headers=request_headers, timeout=timeout)
+    _note_rate_limit(response)
+
+    if response.status_code == 304 and cached is not None:
+        return cached[1]
+
+    response.raise_for_status()
+
+    etag = response.headers.get('ETag')
+    if etag:
+        _etag_cache.set(url, (etag, response.text))
+    return response.text
+
+# GraphQL changeType -> REST status values the rest of the pipeline expects
+_CHANGE_TYPE_STATUS = {
+    'ADDED': 'added',
+    'MODIFIED': 'modified',
+    'RENAMED': 'renamed',
+    'COPIED': 'copied',
+    'CHANGED': 'modified',
+    'DELETED': 'removed'
+}
+
+# Generated/minified artifacts that pass the caller's reviewability
+# filter by extension but are never worth downloading
+_DOWNLOAD_SKIP_SUFFIXES = ('.min.js', '.min.css', '.map')
+
+def fetch_pr_files(pr_info: Dict[str, Any], max_retries: int = 3,
+                   path_filter: Callable[[str], bool] = None) -> List[Dict[str, str]]:
+    """
+    Fetch changed files from a pull request
+
+    A PR's file set is immutable per head sha, so results are memoized
+    on (repo, PR number, head sha) - repeat deliveries for the same
+    commit cost zero GitHub calls. Listing and content download are
+    separate steps so removed files, no-op changes and paths rejected
+    by path_filter never cost a blob download.
+
     Args:
         pr_info: PR information dictionary
-        max_retries: Maximum number of retry attempts
-        
+        max_retries: Maximum number of retry attempts (REST listing)
+        path_filter: Optional predicate; files whose path fails it are
+            dropped before their content is downloaded
+
     Returns:
         List of files with their content
     """
-    for attempt in range(max_retries):
+    head_sha = pr_info.get('head_sha')
+    if head_sha:
         try:
-            # Use GitHub API to get PR files
-            api_url = f"https://api.github.com/repos/{pr_info['repo_full_name']}/pulls/{pr_info['pr_number']}/files"
-            
-            headers = {
-                'Authorization': f'token {Config.GITHUB_TOKEN}',
-                'Accept': 'application/vnd.github.v3+json'
+            cached = _fetch_pr_files_cached(
+                pr_info['repo_full_name'], pr_info['pr_number'], head_sha,
+                max_retries, path_filter
+            )
+            # Deep copy so callers can't mutate the memoized entry
+            return copy.deepcopy(cached)
+        except _EmptyFetch:
+            return []
+    return _fetch_pr_files(pr_info, max_retries, path_filter)
+
+class _EmptyFetch(Exception):
+    """Raised to keep empty (possibly failed) fetches out of the memo"""
+
+@functools.lru_cache(maxsize=256)
+def _fetch_pr_files_cached(repo_full_name: str, pr_number: int, head_sha: str,
+                           max_retries: int,
+                           path_filter: Callable[[str], bool]) -> List[Dict[str, str]]:
+    """Memoized fetch keyed on the immutable PR head sha"""
+    owner, _, name = repo_full_name.partition('/')
+    pr_info = {
+        'repo_full_name': repo_full_name,
+        'repo_owner': owner,
+        'repo_name': name,
+        'pr_number': pr_number,
+        'head_sha': head_sha
+    }
+    files = _fetch_pr_files(pr_info, max_retries, path_filter)
+    if not files:
+        # An empty result may be a transient failure - don't pin it
+        raise _EmptyFetch()
+    return files
+
+def _fetch_pr_files(pr_info: Dict[str, Any], max_retries: int = 3,
+                    path_filter: Callable[[str], bool] = None) -> List[Dict[str, str]]:
+    """Uncached fetch: list, filter, then download content"""
+    candidates = []
+    # Bind loop invariants once - attribute/global lookups repeat per
+    # file otherwise, and PRs can carry hundreds of entries
+    append = candidates.append
+    skip_suffixes = _DOWNLOAD_SKIP_SUFFIXES
+    for file_info in list_pr_files(pr_info, max_retries):
+        path = file_info['path']
+        if file_info['status'] == 'removed':
+            continue
+        if file_info.get('changes', 0) == 0:
+            continue
+        if path_filter is not None and not path_filter(path):
+            continue
+        if path.endswith(skip_suffixes):
+            continue
+        append(file_info)
+
+    if not candidates:
+        return []
+
+    return _fetch_contents(pr_info, candidates)
+
+def list_pr_files(pr_info: Dict[str, Any], max_retries: int = 3) -> List[Dict[str, Any]]:
+    """
+    List a PR's changed files (metadata only, no content)
+
+    Tries a single GraphQL query first, falling back to the REST files
+    endpoint with retry logic.
+
+    Args:
+        pr_info: PR information dictionary
+        max_retries: Maximum number of retry attempts (REST path)
+
+    Returns:
+        List of dicts with path/status/additions/deletions/changes
+    """
+    listed = _list_pr_files_graphql(pr_info)
+    if listed is not None:
+        return listed
+    return _list_pr_files_rest(pr_info, max_retries)
+
+def _list_pr_files_graphql(pr_info: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """List changed files in one GraphQL query, or None on failure"""
+    try:
+        list_query = """
+        query($owner: String!, $name: String!, $number: Int!, $first: Int!) {
+          repository(owner: $owner, name: $name) {
+            pullRequest(number: $number) {
+              files(first: $first) {
+                nodes { path additions deletions changeType }
+              }
             }
-            
-            response = requests.get(api_url, headers=headers, timeout=30)
+          }
+        }"""
+        data = _graphql_request(list_query, {
+            'owner': pr_info['repo_owner'],
+            'name': pr_info['repo_name'],
+            'number': pr_info['pr_number'],
+            'first': Config.MAX_FILES_TO_REVIEW
+        })
+
+        nodes = data['repository']['pullRequest']['files']['nodes']
+        files = []
+        append = files.append
+        status_map = _CHANGE_TYPE_STATUS
+        for node in nodes:
+            additions = node.get('additions', 0)
+            deletions = node.get('deletions', 0)
+            append({
+                'path': node['path'],
+                'additions': additions,
+                'deletions': deletions,
+                'changes': additions + deletions,
+                'status': status_map.get(node.get('changeType'), 'modified')
+            })
+        return files
+
+    except Exception as e:
+        print(f"GraphQL file listing failed, falling back to REST: {e}")
+        return None
+
+def _list_pr_files_rest(pr_info: Dict[str, Any], max_retries: int = 3) -> List[Dict[str, Any]]:
+    """
+    List changed files via the REST files endpoint
+
+    Transient 502/503/504 responses are retried with backoff by the
+    session adapter, so there is no retry loop here; max_retries is
+    kept for signature compatibility.
+    """
+    try:
+        # Ask for exactly the page size we keep - entries past the
+        # review cap would be sliced away after transfer otherwise
+        api_url = (
+            f"https://api.github.com/repos/{pr_info['repo_full_name']}/pulls/"
+            f"{pr_info['pr_number']}/files?per_page={Config.MAX_FILES_TO_REVIEW}"
+        )
+
+        body = _conditional_get(api_url, headers=_HEADERS)
+        files_data = _json_loads(body)
+
+        # Limit number of files
+        files_data = files_data[:Config.MAX_FILES_TO_REVIEW]
+
+        return [{
+            'path': file_info['filename'],
+            'additions': file_info.get('additions', 0),
+            'deletions': file_info.get('deletions', 0),
+            'changes': file_info.get('changes', 0),
+            'status': file_info.get('status', 'modified'),
+            'raw_url': file_info.get('raw_url')
+        } for file_info in files_data]
+
+    except requests.RequestException as e:
+        print(f"Error listing PR files: {e}")
+        return []
+    except Exception as e:
+        print(f"Unexpected error listing PR files: {e}")
+        return []
+
+def _fetch_contents(pr_info: Dict[str, Any],
+                    candidates: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Attach file content to the filtered candidates
+
+    One batched GraphQL blob query when possible; per-file REST raw
+    fetches otherwise.
+    """
+    blobs = _fetch_blobs_graphql(pr_info, [f['path'] for f in candidates])
+
+    if blobs is not None:
+        contents = [blobs.get(f['path']) for f in candidates]
+    else:
+        # REST fallback: the downloads are independent GETs against the
+        # pooled session, so fan them out - 20 files cost ~3 RTTs
+        # instead of 20
+        with ThreadPoolExecutor(max_workers=min(8, len(candidates))) as pool:
+            contents = list(pool.map(partial(fetch_file_content, pr_info), candidates))
+
+    files = []
+    for file_info, content in zip(candidates, contents):
+        if content is None:
+            continue
+        files.append({
+            'path': file_info['path'],
+            'content': content,
+            'additions': file_info['additions'],
+            'deletions': file_info['deletions'],
+            'changes': file_info['changes'],
+            'status': file_info['status']
+        })
+    return files
+
+# GraphQL node-cost limits make very wide aliased queries risky; 50
+# blobs per request keeps well inside them
+_BLOB_BATCH_SIZE = 50
+
+def _fetch_blobs_graphql(pr_info: Dict[str, Any],
+                         paths: List[str]) -> Optional[Dict[str, str]]:
+    """
+    Resolve many blobs at the PR head sha via aliased GraphQL queries
+
+    Paths are chunked into batches of at most 50 aliases per query to
+    stay within GraphQL node-cost limits.
+
+    Returns:
+        path -> text mapping (binary/missing blobs omitted), or None if
+        a query fails and the caller should fetch per file over REST
+    """
+    try:
+        head_sha = pr_info['head_sha']
+        blobs = {}
+
+        for start in range(0, len(paths), _BLOB_BATCH_SIZE):
+            batch = paths[start:start + _BLOB_BATCH_SIZE]
+            fields = []
+            for i, path in enumerate(batch):
+                expression = f"{head_sha}:{path}"
+                fields.append(
+                    f'f{i}: object(expression: {_graphql_string(expression)}) '
+                    '{ ... on Blob { text isBinary } }'
+                )
+            blob_query = (
+                'query($owner: String!, $name: String!) '
+                '{ repository(owner: $owner, name: $name) { ' + ' '.join(fields) + ' } }'
+            )
+            data = _graphql_request(blob_query, {
+                'owner': pr_info['repo_owner'],
+                'name': pr_info['repo_name']
+            })
+            repository = data['repository']
+
+            for i, path in enumerate(batch):
+                blob = repository.get(f'f{i}')
+                if blob and not blob.get('isBinary') and blob.get('text') is not None:
+                    blobs[path] = blob['text']
+
+        return blobs
+
+    except Exception as e:
+        print(f"GraphQL blob fetch failed, falling back to REST: {e}")
+        return None
+
+def fetch_file_content(pr_info: Dict[str, Any],
+                       file_info: Dict[str, Any]) -> Optional[str]:
+    """
+    Fetch one file's content over REST
+
+    Args:
+        pr_info: PR information dictionary
+        file_info: File metadata from list_pr_files
+
+    Returns:
+        File text, or None if it can't be fetched
+    """
+    content_url = file_info.get('raw_url')
+    if not content_url:
+        content_url = (
+            f"https://raw.githubusercontent.com/{pr_info['repo_full_name']}/"
+            f"{pr_info['head_sha']}/{file_info['path']}"
+        )
+
+    # Everything past the truncation limit is thrown away anyway, so
+    # bound the transfer both ways: Range asks the server to stop early
+    # (~200 bytes/line headroom) and the streamed read below breaks at
+    # the line cap, closing the connection instead of decoding a
+    # multi-MB body into memory first.
+    max_bytes = Config.MAX_LINES_PER_FILE * 200
+    headers = {**_RAW_HEADERS, 'Range': f'bytes=0-{max_bytes}'}
+    cached = _etag_cache.get(content_url)
+    if cached is not None:
+        headers['If-None-Match'] = cached[0]
+
+    try:
+        with _session.get(content_url, headers=headers, stream=True, timeout=30) as response:
+            _note_rate_limit(response)
+
+            if response.status_code == 304 and cached is not None:
+                return cached[1]
             response.raise_for_status()
-            
-            files_data = response.json()
-            
-            # Limit number of files
-            files_data = files_data[:Config.MAX_FILES_TO_REVIEW]
-            
-            files = []
-            for file_info in files_data:
-                # Skip deleted files
-                if file_info.get('status') == 'removed':
-                    continue
-                
-                # Fetch file content
-                content_url = file_info.get('raw_url')
-                if content_url:
-                    try:
-                        content_response = requests.get(content_url, timeout=30)
-                        if content_response.status_code == 200:
-                            files.append({
-                                'path': file_info['filename'],
-                                'content': content_response.text,
-                                'additions': file_info.get('additions', 0),
-                                'deletions': file_info.get('deletions', 0),
-                                'changes': file_info.get('changes', 0),
-                                'status': file_info.get('status', 'modified')
-                            })
-                    except requests.RequestException as e:
-                        print(f"Warning: Failed to fetch content for {file_info['filename']}: {e}")
-                        continue
-            
-            return files
-            
-        except requests.RequestException as e:
-            print(f"Error fetching PR files (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)  # Exponential backoff
-                continue
-            return []
-        except Exception as e:
-            print(f"Unexpected error fetching PR files: {e}")
-            return []
-    
-    return []
 
-def truncate_content(content: str, max_lines: int = None) -> str:
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            # islice caps the read in C instead of re-reading
+            # Config.MAX_LINES_PER_FILE on every line of the old
+            # enumerate loop
+            lines = islice(response.iter_lines(decode_unicode=True),
+                           Config.MAX_LINES_PER_FILE)
+            content = '\n'.join(lines)
+
+            etag = response.headers.get('ETag')
+            if etag:
+                _etag_cache.set(content_url, (etag, content))
+            return content
+
+    except requests.RequestException as e:
+        print(f"Warning: Failed to fetch content for {file_info['path']}: {e}")
+    return None
+
+def _graphql_request(query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+    """POST a GraphQL query and return its data, raising on errors"""
+    response = _session.post(
+        _GRAPHQL_URL,
+        json={'query': query, 'variables': variables},
+        headers=_GRAPHQL_HEADERS,
+        timeout=30
+    )
+    response.raise_for_status()
+    # Parse the raw bytes - orjson handles utf-8 natively and skips the
+    # intermediate text decode response.json() would do
+    data = _json_loads(response.content)
+    if data.get('errors'):
+        raise ValueError(data['errors'])
+    return data['data']
+
+def _graphql_string(value: str) -> str:
+    """Quote a value as a GraphQL string literal"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def truncate_content(content: str, max_lines: int = None) -> tuple:
     """
     Truncate content to maximum number of lines
-    
+
     Args:
         content: File content
         max_lines: Maximum lines (defaults to config)
-        
+
     Returns:
-        Truncated content
+        (content, line_count) tuple - the count comes for free from the
+        split this function already does, so callers don't rescan the
+        string just to log its size
     """
     if max_lines is None:
         max_lines = Config.MAX_LINES_PER_FILE
-    
-    lines = content.split('\n')
-    if len(lines) <= max_lines:
-        return content
-    
-    truncated = '\n'.join(lines[:max_lines])
-    truncated += f"\n\n... (truncated {len(lines) - max_lines} lines)"
-    
-    return truncated
+
+    # Walk newline positions with str.find instead of materializing a
+    # full line list - a 50k-line generated file costs O(max_lines)
+    # work and one slice rather than a huge list plus rejoin
+    pos = -1
+    find = content.find
+    for found in range(max_lines):
+        nxt = find('\n', pos + 1)
+        if nxt == -1:
+            return content, found + 1
+        pos = nxt
+
+    dropped = content.count('\n', pos + 1) + 1
+    truncated = content[:pos] + f"\n\n... (truncated {dropped} lines)"
+    return truncated, max_lines
 
 def format_error_response(error: str) -> Dict[str, Any]:
     """
     Format error response
-    
+
     Args:
         error: Error message
-        
+
     Returns:
         Formatted error dictionary
     """
@@ -107,4 +522,4 @@ def format_error_response(error: str) -> Dict[str, Any]:
         'success': False,
         'error': str(error),
         'message': 'Code review failed'
-    }
\ No newline at end of file
+    }